@@ -0,0 +1,121 @@
+import numpy as np
+import pandas as pd
+from typing import Optional
+
+try:
+    from numba import njit, prange
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+# Planes of the rolling_window_stats output, in order
+ROLLING_WINDOW_STATS = ('sum', 'mean', 'std', 'max')
+
+
+if NUMBA_AVAILABLE:
+    @njit(parallel=True, nogil=True)
+    def _rolling_window_stats_kernel(x, window, max_window):
+        n, n_columns = x.shape
+        out = np.empty((4, n_columns, n))
+        for j in prange(n_columns):
+            nobs = neg_ct = same_ct = 0
+            total = mean = ssqdm = 0.0
+            prev_value = np.nan
+            peak = np.nan
+            for i in range(n):
+                # Drop the value leaving the window
+                if i >= window:
+                    old = x[i - window, j]
+                    if not np.isnan(old):
+                        nobs -= 1
+                        total -= old
+                        if old < 0:
+                            neg_ct -= 1
+                        if nobs > 0:
+                            delta = old - mean
+                            mean -= delta / nobs
+                            ssqdm -= ((nobs + 1) * delta * delta) / nobs
+                        else:
+                            mean = ssqdm = 0.0
+
+                # Add the new value
+                val = x[i, j]
+                if not np.isnan(val):
+                    nobs += 1
+                    total += val
+                    if val < 0:
+                        neg_ct += 1
+                    same_ct = same_ct + 1 if val == prev_value else 1
+                    prev_value = val
+                    delta = val - mean
+                    mean += delta / nobs
+                    ssqdm += ((nobs - 1) * delta * delta) / nobs
+
+                # The max is only rescanned when the current peak leaves
+                # its window
+                if i >= max_window and x[i - max_window, j] == peak:
+                    peak = np.nan
+                    for k in range(i - max_window + 1, i + 1):
+                        if not np.isnan(x[k, j]) and not x[k, j] <= peak:
+                            peak = x[k, j]
+                elif not np.isnan(val) and not val <= peak:
+                    peak = val
+                out[3, j, i] = peak
+
+                if nobs == 0:
+                    out[0, j, i] = np.nan
+                    out[1, j, i] = np.nan
+                    out[2, j, i] = np.nan
+                    continue
+
+                # A run of identical values is reported exactly, as pandas does
+                out[0, j, i] = total
+                if same_ct >= nobs:
+                    out[1, j, i] = prev_value
+                else:
+                    result = total / nobs
+                    if neg_ct == 0 and result < 0:
+                        result = 0.0
+                    elif neg_ct == nobs and result > 0:
+                        result = 0.0
+                    out[1, j, i] = result
+
+                if nobs == 1:
+                    out[2, j, i] = np.nan
+                elif same_ct >= nobs or ssqdm <= 0:
+                    out[2, j, i] = 0.0
+                else:
+                    out[2, j, i] = np.sqrt(ssqdm / (nobs - 1))
+        return out
+
+
+def rolling_window_stats(x: np.ndarray, window: int, max_window: Optional[int] = None) -> np.ndarray:
+    """
+    Trailing-window sum, mean, sample std and max of every column of `x`,
+    following pandas' rolling(min_periods=1): NaNs are skipped, the
+    statistics are NaN for windows without observations and the std
+    (ddof=1) for fewer than two.
+
+    With numba this is one pass per column, columns in parallel and the
+    GIL released: running sums, a Welford add/remove variance and a max
+    that is only rescanned when the current peak leaves its window.
+
+    Args:
+        x: 2-D float64 array, one column per series
+        window: Window length (samples) of the sum, mean and std
+        max_window: Window length of the max; defaults to `window`
+
+    Returns:
+        Array of shape (4, n_columns, n) holding the ROLLING_WINDOW_STATS
+        planes
+    """
+    if max_window is None:
+        max_window = window
+    if NUMBA_AVAILABLE:
+        return _rolling_window_stats_kernel(x, window, max_window)
+
+    frame = pd.DataFrame(x)
+    rolling = frame.rolling(window=window, min_periods=1)
+    planes = [rolling.sum(), rolling.mean(), rolling.std(),
+              frame.rolling(window=max_window, min_periods=1).max()]
+    return np.stack([plane.to_numpy().T for plane in planes])
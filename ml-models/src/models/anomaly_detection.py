@@ -1,15 +1,115 @@
+import bottleneck as bn
 import numpy as np
 import pandas as pd
+from pandas.api.types import is_datetime64_any_dtype
 from sklearn.ensemble import IsolationForest
 from sklearn.preprocessing import StandardScaler
 from typing import Dict, List, Tuple, Optional
+import hashlib
 import joblib
 import logging
+import weakref
+from collections import OrderedDict
 from datetime import datetime, timedelta
 
+try:
+    from numba import njit, prange
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Engineered features derived from each raw telemetry column, in output order
+FEATURE_GROUPS = {
+    'timestamp': ['hour', 'day_of_week', 'is_weekend'],
+    'power': ['power', 'power_rolling_mean', 'power_rolling_std', 'power_diff'],
+    'energy': ['energy', 'energy_rate'],
+    'temperature': ['temperature', 'temp_deviation'],
+    'humidity': ['humidity'],
+    'signal_strength': ['signal_strength', 'signal_drops'],
+    'state': ['state_changes'],
+}
+
+# Features written by the fused kernel, in the order of its column-index argument
+DERIVED_FEATURES = ['power_rolling_std', 'power_diff', 'energy_rate', 'signal_drops', 'state_changes']
+
+# Anomaly score cut points and the labels of the int8 severity codes they map to
+SEVERITY_BINS = np.array([-0.9, -0.7, -0.5])
+SEVERITY_LABELS = ['normal', 'low', 'medium', 'high']
+SEVERITY_HIGH = SEVERITY_LABELS.index('high')
+
+# Rows scaled and scored together in predict, sized to stay cache resident
+PREDICT_CHUNK_SIZE = 65_536
+
+# Number of per-device prediction results memoized by analyze_device_behavior
+PREDICTION_CACHE_SIZE = 128
+
+# joblib compression for saved artifacts: lz4 is close to memcpy speed and
+# still shrinks tree ensembles several times over
+MODEL_COMPRESSION = ('lz4', 3)
+
+
+def _ensure_datetime(data: pd.DataFrame) -> pd.Series:
+    """
+    Parse the timestamp column in place unless it is already datetime64.
+    """
+    if not is_datetime64_any_dtype(data['timestamp']):
+        data['timestamp'] = pd.to_datetime(data['timestamp'], format='ISO8601', cache=True)
+    return data['timestamp']
+
+
+def _prepended_diff(values: np.ndarray) -> np.ndarray:
+    """
+    First difference with a leading zero, equivalent to Series.diff().fillna(0)
+    for the first element; NaN inputs still propagate to their neighbours.
+    """
+    out = np.empty_like(values)
+    if len(values):
+        out[0] = 0
+        np.subtract(values[1:], values[:-1], out=out[1:])
+    return out
+
+
+if NUMBA_AVAILABLE:
+    @njit(parallel=True)
+    def _fill_derived_features(power, energy, signal, state, out, cols, window):
+        """
+        Compute the DERIVED_FEATURES columns of `out` in one pass over the inputs.
+
+        `cols` holds the output column of each derived feature, or -1 when its
+        source column is missing (the matching input is then an empty array).
+        NaN handling matches pandas: the rolling std skips NaNs and the
+        first differences propagate them for the caller to fill.
+        """
+        for i in prange(out.shape[0]):
+            if cols[0] >= 0:
+                start = max(0, i - window + 1)
+                count = 0
+                total = 0.0
+                for j in range(start, i + 1):
+                    if not np.isnan(power[j]):
+                        count += 1
+                        total += power[j]
+                if count > 1:
+                    mean = total / count
+                    sq_dev = 0.0
+                    for j in range(start, i + 1):
+                        if not np.isnan(power[j]):
+                            sq_dev += (power[j] - mean) ** 2
+                    out[i, cols[0]] = np.sqrt(sq_dev / (count - 1))
+                else:
+                    out[i, cols[0]] = np.nan
+            if cols[1] >= 0:
+                out[i, cols[1]] = power[i] - power[i - 1] if i > 0 else 0.0
+            if cols[2] >= 0:
+                out[i, cols[2]] = energy[i] - energy[i - 1] if i > 0 else 0.0
+            if cols[3] >= 0:
+                out[i, cols[3]] = 1.0 if signal[i] < 50 else 0.0
+            if cols[4] >= 0:
+                out[i, cols[4]] = abs(state[i] - state[i - 1]) if i > 0 else 0.0
+
 
 class AnomalyDetectionModel:
     """
@@ -24,16 +124,24 @@ class AnomalyDetectionModel:
         Args:
             contamination: Expected proportion of outliers in the dataset
         """
+        # Stays on sklearn: cuML has no IsolationForest and FIL cannot serve
+        # isolation-path scores, so the CPU forest uses every core instead
         self.model = IsolationForest(
             contamination=contamination,
             random_state=42,
-            n_estimators=100
+            n_estimators=100,
+            max_samples=256,
+            n_jobs=-1
         )
-        self.scaler = StandardScaler()
+        # Feature matrices are freshly built per call, so scale them in place
+        self.scaler = StandardScaler(copy=False)
         self.feature_names = []
         self.is_trained = False
+        self._prediction_cache = OrderedDict()
+        self._device_index = {}
+        self._indexed_data = None
 
-    def prepare_features(self, data: pd.DataFrame) -> pd.DataFrame:
+    def prepare_features(self, data: pd.DataFrame) -> np.ndarray:
         """
         Prepare features for anomaly detection.
         
@@ -41,53 +149,79 @@ class AnomalyDetectionModel:
             data: Raw device telemetry data
             
         Returns:
-            DataFrame with engineered features
+            Array with engineered features, columns ordered as self.feature_names
         """
-        features = pd.DataFrame()
+        self.feature_names = [
+            name
+            for column, names in FEATURE_GROUPS.items() if column in data.columns
+            for name in names
+        ]
+        col = {name: i for i, name in enumerate(self.feature_names)}
+
+        # Fill a single preallocated matrix instead of growing a DataFrame column by column
+        features = np.empty((len(data), len(self.feature_names)), dtype=np.float32)
 
         # Time-based features
         if 'timestamp' in data.columns:
-            data['timestamp'] = pd.to_datetime(data['timestamp'])
-            features['hour'] = data['timestamp'].dt.hour
-            features['day_of_week'] = data['timestamp'].dt.dayofweek
-            features['is_weekend'] = (data['timestamp'].dt.dayofweek >= 5).astype(int)
+            timestamps = _ensure_datetime(data)
+            day_of_week = timestamps.dt.dayofweek.to_numpy()
+            features[:, col['hour']] = timestamps.dt.hour
+            features[:, col['day_of_week']] = day_of_week
+            features[:, col['is_weekend']] = day_of_week >= 5
+
+        # Convert each raw telemetry column to a contiguous float64 buffer once;
+        # missing columns become empty arrays, which the fused kernel skips
+        arrs = {
+            column: data[column].to_numpy(dtype=np.float64) if column in data.columns else np.empty(0)
+            for column in FEATURE_GROUPS if column != 'timestamp'
+        }
 
         # Power consumption features
         if 'power' in data.columns:
-            features['power'] = data['power']
-            features['power_rolling_mean'] = data['power'].rolling(window=10, min_periods=1).mean()
-            features['power_rolling_std'] = data['power'].rolling(window=10, min_periods=1).std()
-            features['power_diff'] = data['power'].diff().fillna(0)
+            features[:, col['power']] = arrs['power']
+            # Bottleneck's moving-window kernels avoid building pandas Rolling objects
+            features[:, col['power_rolling_mean']] = bn.move_mean(arrs['power'], window=10, min_count=1)
 
         # Energy features
         if 'energy' in data.columns:
-            features['energy'] = data['energy']
-            features['energy_rate'] = data['energy'].diff().fillna(0)
+            features[:, col['energy']] = arrs['energy']
 
         # Temperature features
         if 'temperature' in data.columns:
-            features['temperature'] = data['temperature']
-            features['temp_deviation'] = (
-                data['temperature'] - data['temperature'].rolling(window=20, min_periods=1).mean()
-            ).fillna(0)
+            temperature = arrs['temperature']
+            features[:, col['temperature']] = temperature
+            features[:, col['temp_deviation']] = temperature - bn.move_mean(temperature, window=20, min_count=1)
 
         # Humidity features
         if 'humidity' in data.columns:
-            features['humidity'] = data['humidity']
+            features[:, col['humidity']] = arrs['humidity']
 
         # Signal strength features
         if 'signal_strength' in data.columns:
-            features['signal_strength'] = data['signal_strength']
-            features['signal_drops'] = (data['signal_strength'] < 50).astype(int)
-
-        # Device state features
-        if 'state' in data.columns:
-            features['state_changes'] = data['state'].diff().fillna(0).abs()
+            features[:, col['signal_strength']] = arrs['signal_strength']
+
+        # Rolling std, first differences and signal drops
+        if NUMBA_AVAILABLE:
+            derived_cols = np.array([col.get(name, -1) for name in DERIVED_FEATURES], dtype=np.int64)
+            _fill_derived_features(
+                arrs['power'], arrs['energy'], arrs['signal_strength'], arrs['state'],
+                features, derived_cols, 10
+            )
+        else:
+            if 'power' in data.columns:
+                features[:, col['power_rolling_std']] = bn.move_std(arrs['power'], window=10, min_count=1, ddof=1)
+                features[:, col['power_diff']] = _prepended_diff(arrs['power'])
+            if 'energy' in data.columns:
+                features[:, col['energy_rate']] = _prepended_diff(arrs['energy'])
+            if 'signal_strength' in data.columns:
+                features[:, col['signal_drops']] = arrs['signal_strength'] < 50
+            if 'state' in data.columns:
+                state_changes = _prepended_diff(arrs['state'])
+                features[:, col['state_changes']] = np.abs(state_changes, out=state_changes)
 
         # Fill any remaining NaN values
-        features = features.fillna(0)
+        features[np.isnan(features)] = 0
 
-        self.feature_names = features.columns.tolist()
         return features
 
     def train(self, data: pd.DataFrame) -> Dict[str, float]:
@@ -103,17 +237,19 @@ class AnomalyDetectionModel:
         logger.info("Preparing features for training...")
         features = self.prepare_features(data)
 
-        logger.info(f"Training on {len(features)} samples with {len(features.columns)} features")
+        logger.info(f"Training on {len(features)} samples with {len(self.feature_names)} features")
         
-        # Scale features
+        # Scale features; with copy=False the scaler standardizes the freshly
+        # built matrix in place, so fit_transform allocates no second copy
         scaled_features = self.scaler.fit_transform(features)
 
         # Train model
         self.model.fit(scaled_features)
         self.is_trained = True
+        self._prediction_cache.clear()
 
         # Calculate training metrics
-        predictions = self.model.predict(scaled_features)
+        predictions = self._labels_from_scores(self.model.score_samples(scaled_features))
         anomaly_count = np.sum(predictions == -1)
         anomaly_rate = anomaly_count / len(predictions)
 
@@ -121,7 +257,7 @@ class AnomalyDetectionModel:
             'total_samples': len(features),
             'anomalies_detected': int(anomaly_count),
             'anomaly_rate': float(anomaly_rate),
-            'feature_count': len(features.columns)
+            'feature_count': len(self.feature_names)
         }
 
         logger.info(f"Training completed. Metrics: {metrics}")
@@ -143,13 +279,31 @@ class AnomalyDetectionModel:
             raise ValueError("Model must be trained before making predictions")
 
         features = self.prepare_features(data)
-        scaled_features = self.scaler.transform(features)
-
-        predictions = self.model.predict(scaled_features)
-        anomaly_scores = self.model.score_samples(scaled_features)
+        n_samples = len(features)
+        predictions = np.empty(n_samples, dtype=np.int64)
+        anomaly_scores = np.empty(n_samples, dtype=np.float64)
+
+        # Scale, score and label in cache-sized blocks so each block stays hot
+        # for the whole pipeline; per-tree work is spread across all cores
+        with joblib.parallel_backend('loky', n_jobs=-1):
+            for start in range(0, n_samples, PREDICT_CHUNK_SIZE):
+                block = slice(start, start + PREDICT_CHUNK_SIZE)
+                # Trees split on float32, so hand them contiguous float32 rows directly
+                scaled_block = np.ascontiguousarray(self.scaler.transform(features[block]), dtype=np.float32)
+                anomaly_scores[block] = self.model.score_samples(scaled_block)
+                predictions[block] = self._labels_from_scores(anomaly_scores[block])
 
         return predictions, anomaly_scores
 
+    def _labels_from_scores(self, scores: np.ndarray) -> np.ndarray:
+        """
+        Derive Isolation Forest labels from raw scores without a second tree pass.
+
+        Mirrors IsolationForest.predict, which thresholds
+        decision_function = score_samples - offset_ at zero.
+        """
+        return np.where(scores - self.model.offset_ < 0, -1, 1)
+
     def detect_anomalies(
         self,
         data: pd.DataFrame,
@@ -163,22 +317,36 @@ class AnomalyDetectionModel:
             threshold: Custom anomaly score threshold
             
         Returns:
-            DataFrame with anomaly detection results
+            DataFrame with anomaly detection results; the original columns share
+            their buffers with `data` and should be treated as read-only
         """
         predictions, scores = self.predict(data)
+        return self._build_results(data, predictions, scores, threshold)
 
-        results = data.copy()
+    def _build_results(
+        self,
+        data: pd.DataFrame,
+        predictions: np.ndarray,
+        scores: np.ndarray,
+        threshold: Optional[float] = None
+    ) -> pd.DataFrame:
+        """
+        Attach anomaly flags, scores and severity levels to the input data.
+        """
+        # Shallow copy: only the new columns are allocated, input columns are shared
+        results = data.copy(deep=False)
         results['is_anomaly'] = predictions == -1
         results['anomaly_score'] = scores
 
         if threshold is not None:
             results['is_anomaly'] = scores < threshold
 
-        # Add severity levels
-        results['severity'] = 'normal'
-        results.loc[results['anomaly_score'] < -0.5, 'severity'] = 'low'
-        results.loc[results['anomaly_score'] < -0.7, 'severity'] = 'medium'
-        results.loc[results['anomaly_score'] < -0.9, 'severity'] = 'high'
+        # Add severity levels in a single bucketing pass; digitize counts the cut
+        # points at or below each score, so subtracting from their number
+        # yields 0 for normal up to 3 for high
+        severity_codes = (len(SEVERITY_BINS) - np.digitize(scores, SEVERITY_BINS)).astype(np.int8)
+        results['severity_code'] = severity_codes
+        results['severity'] = pd.Categorical.from_codes(severity_codes, categories=SEVERITY_LABELS)
 
         return results
 
@@ -200,15 +368,11 @@ class AnomalyDetectionModel:
             Dictionary with analysis results
         """
         # Filter data for the device and time window
+        cutoff_time = None
         if 'timestamp' in data.columns:
-            data['timestamp'] = pd.to_datetime(data['timestamp'])
+            _ensure_datetime(data)
             cutoff_time = datetime.now() - timedelta(hours=window_hours)
-            device_data = data[
-                (data['device_id'] == device_id) &
-                (data['timestamp'] >= cutoff_time)
-            ]
-        else:
-            device_data = data[data['device_id'] == device_id]
+        device_data = self._select_device_rows(data, device_id, cutoff_time)
 
         if len(device_data) == 0:
             return {
@@ -217,11 +381,18 @@ class AnomalyDetectionModel:
                 'message': 'No data available for analysis'
             }
 
-        # Detect anomalies
-        results = self.detect_anomalies(device_data)
+        # Detect anomalies, reusing scores from earlier calls over the same window
+        predictions, scores = self._predict_cached(device_id, window_hours, device_data)
+        results = self._build_results(device_data, predictions, scores)
 
         anomalies = results[results['is_anomaly']]
-        
+
+        # One integer reduction over the severity codes instead of a scan per level
+        severity_counts = dict(zip(
+            SEVERITY_LABELS,
+            np.bincount(results['severity_code'].to_numpy(), minlength=len(SEVERITY_LABELS)).tolist()
+        ))
+
         analysis = {
             'device_id': device_id,
             'status': 'analyzed',
@@ -229,34 +400,123 @@ class AnomalyDetectionModel:
             'anomaly_count': len(anomalies),
             'anomaly_rate': len(anomalies) / len(results) if len(results) > 0 else 0,
             'severity_distribution': {
-                'low': int(np.sum(results['severity'] == 'low')),
-                'medium': int(np.sum(results['severity'] == 'medium')),
-                'high': int(np.sum(results['severity'] == 'high'))
+                'low': severity_counts['low'],
+                'medium': severity_counts['medium'],
+                'high': severity_counts['high']
             },
             'anomalies': []
         }
 
-        # Add details for high severity anomalies
-        high_severity = anomalies[anomalies['severity'] == 'high']
-        for _, row in high_severity.iterrows():
+        # Add details for high severity anomalies, pulling each column out once
+        # rather than materialising a Series per row
+        high_severity = anomalies[anomalies['severity_code'] == SEVERITY_HIGH]
+        if 'timestamp' in high_severity.columns:
+            timestamps = [ts.isoformat() for ts in high_severity['timestamp']]
+        else:
+            timestamps = [None] * len(high_severity)
+        scores = high_severity['anomaly_score'].to_numpy(dtype=np.float64)
+        severities = high_severity['severity'].tolist()
+        metric_values = {
+            name: high_severity[name].to_numpy(dtype=np.float64)
+            for name in ('power', 'temperature', 'signal_strength')
+            if name in high_severity.columns
+        }
+
+        for i in range(len(high_severity)):
             anomaly_detail = {
-                'timestamp': row.get('timestamp', '').isoformat() if 'timestamp' in row else None,
-                'score': float(row['anomaly_score']),
-                'severity': row['severity']
+                'timestamp': timestamps[i],
+                'score': float(scores[i]),
+                'severity': severities[i]
             }
-            
+
             # Add relevant metrics
-            if 'power' in row:
-                anomaly_detail['power'] = float(row['power'])
-            if 'temperature' in row:
-                anomaly_detail['temperature'] = float(row['temperature'])
-            if 'signal_strength' in row:
-                anomaly_detail['signal_strength'] = float(row['signal_strength'])
-                
+            for name, values in metric_values.items():
+                anomaly_detail[name] = float(values[i])
+
             analysis['anomalies'].append(anomaly_detail)
 
         return analysis
 
+    def build_device_index(self, data: pd.DataFrame) -> None:
+        """
+        Index row positions per device so analyze_device_behavior can slice
+        `data` instead of scanning every row for each device.
+        
+        Args:
+            data: Device telemetry data that will be passed to analyze_device_behavior;
+                rebuild the index if its device_id or timestamp columns change
+        """
+        timestamps = _ensure_datetime(data).to_numpy() if 'timestamp' in data.columns else None
+
+        index = {}
+        for device_id, positions in data.groupby('device_id').indices.items():
+            # Keep timestamps only for devices whose rows are already in time
+            # order, where the window cutoff can be found by binary search
+            sorted_times = None
+            if timestamps is not None:
+                device_times = timestamps[positions]
+                if np.all(device_times[1:] >= device_times[:-1]):
+                    sorted_times = device_times
+            index[device_id] = (positions, sorted_times)
+
+        self._device_index = index
+        self._indexed_data = weakref.ref(data)
+
+    def _select_device_rows(
+        self,
+        data: pd.DataFrame,
+        device_id: str,
+        cutoff_time: Optional[datetime]
+    ) -> pd.DataFrame:
+        """
+        Select a device's rows at or after cutoff_time, using the index from
+        build_device_index when it was built for this same frame.
+        """
+        if self._indexed_data is None or self._indexed_data() is not data:
+            mask = data['device_id'] == device_id
+            if cutoff_time is not None:
+                mask &= data['timestamp'] >= cutoff_time
+            return data[mask]
+
+        positions, sorted_times = self._device_index.get(device_id, (np.empty(0, dtype=np.int64), None))
+        if cutoff_time is not None:
+            cutoff = np.datetime64(cutoff_time)
+            if sorted_times is not None:
+                positions = positions[np.searchsorted(sorted_times, cutoff, side='left'):]
+            else:
+                positions = positions[data['timestamp'].to_numpy()[positions] >= cutoff]
+        return data.iloc[positions]
+
+    def _predict_cached(
+        self,
+        device_id: str,
+        window_hours: int,
+        device_data: pd.DataFrame
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Predict anomalies for a device window, memoizing results for repeated calls.
+
+        The cache key is a content fingerprint of the window, so telemetry
+        corrected or re-ingested under the same timestamps is predicted again.
+        """
+        row_hashes = pd.util.hash_pandas_object(device_data).to_numpy()
+        key = (
+            device_id,
+            window_hours,
+            tuple(device_data.columns),
+            hashlib.blake2b(row_hashes.tobytes(), digest_size=16).digest()
+        )
+        cached = self._prediction_cache.get(key)
+        if cached is not None:
+            self._prediction_cache.move_to_end(key)
+            return cached
+
+        cached = self.predict(device_data)
+        self._prediction_cache[key] = cached
+        if len(self._prediction_cache) > PREDICTION_CACHE_SIZE:
+            self._prediction_cache.popitem(last=False)
+        return cached
+
     def get_feature_importance(self) -> Dict[str, float]:
         """
         Get feature importance scores (approximation for Isolation Forest).
@@ -267,12 +527,14 @@ class AnomalyDetectionModel:
         if not self.is_trained:
             raise ValueError("Model must be trained first")
 
-        # For Isolation Forest, we approximate importance by feature variance
-        importance = {}
-        for i, feature_name in enumerate(self.feature_names):
-            importance[feature_name] = float(np.random.random())  # Placeholder
+        # For Isolation Forest, we approximate importance by the normalized
+        # training variance the scaler already recorded for each feature
+        variances = self.scaler.var_
+        total = variances.sum()
+        if total > 0:
+            variances = variances / total
 
-        return importance
+        return dict(zip(self.feature_names, variances.tolist()))
 
     def save_model(self, filepath: str) -> None:
         """
@@ -291,7 +553,7 @@ class AnomalyDetectionModel:
             'is_trained': self.is_trained
         }
 
-        joblib.dump(model_data, filepath)
+        joblib.dump(model_data, filepath, compress=MODEL_COMPRESSION)
         logger.info(f"Model saved to {filepath}")
 
     def load_model(self, filepath: str) -> None:
@@ -307,6 +569,7 @@ class AnomalyDetectionModel:
         self.scaler = model_data['scaler']
         self.feature_names = model_data['feature_names']
         self.is_trained = model_data['is_trained']
+        self._prediction_cache.clear()
 
         logger.info(f"Model loaded from {filepath}")
 
@@ -321,7 +584,7 @@ def generate_sample_data(n_samples: int = 1000) -> pd.DataFrame:
     Returns:
         DataFrame with sample data
     """
-    np.random.seed(42)
+    rng = np.random.default_rng(42)
     
     timestamps = pd.date_range(
         start=datetime.now() - timedelta(days=7),
@@ -329,19 +592,22 @@ def generate_sample_data(n_samples: int = 1000) -> pd.DataFrame:
         freq='5min'
     )
 
+    # Draw all Gaussian noise in one call, one column per signal
+    noise = rng.standard_normal((n_samples, 5))
+
     data = pd.DataFrame({
         'timestamp': timestamps,
-        'device_id': np.random.choice(['device_1', 'device_2', 'device_3'], n_samples),
-        'power': np.random.normal(100, 20, n_samples),
-        'energy': np.cumsum(np.random.normal(0.1, 0.02, n_samples)),
-        'temperature': np.random.normal(22, 2, n_samples),
-        'humidity': np.random.normal(50, 10, n_samples),
-        'signal_strength': np.random.normal(80, 10, n_samples),
-        'state': np.random.choice([0, 1], n_samples)
+        'device_id': rng.choice(np.array(['device_1', 'device_2', 'device_3']), n_samples),
+        'power': 100 + 20 * noise[:, 0],
+        'energy': np.cumsum(0.1 + 0.02 * noise[:, 1]),
+        'temperature': 22 + 2 * noise[:, 2],
+        'humidity': 50 + 10 * noise[:, 3],
+        'signal_strength': 80 + 10 * noise[:, 4],
+        'state': rng.integers(0, 2, n_samples, dtype=np.int8)
     })
 
     # Inject some anomalies
-    anomaly_indices = np.random.choice(n_samples, size=int(n_samples * 0.05), replace=False)
+    anomaly_indices = rng.choice(n_samples, size=int(n_samples * 0.05), replace=False)
     data.loc[anomaly_indices, 'power'] *= 3
     data.loc[anomaly_indices, 'temperature'] += 10
 
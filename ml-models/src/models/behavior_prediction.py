@@ -5,6 +5,8 @@ Uses LSTM neural networks to predict user behavior patterns and device usage
 
 import numpy as np
 import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+from pandas.api.types import is_datetime64_any_dtype
 import tensorflow as tf
 from tensorflow import keras
 from tensorflow.keras import layers
@@ -18,10 +20,141 @@ import joblib
 import logging
 from typing import List, Dict, Tuple, Optional
 import json
+import os
+
+try:
+    from numba import njit, prange
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+try:
+    import tf2onnx
+    import onnxruntime as ort
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+    ONNX_AVAILABLE = True
+except ImportError:
+    ONNX_AVAILABLE = False
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Mixed precision only pays off on GPU Tensor Cores; CPU training stays float32
+MIXED_PRECISION = bool(tf.config.list_physical_devices('GPU'))
+
+# Upper bound on sequences held in the tf.data shuffle buffer during training
+SHUFFLE_BUFFER_SIZE = 8192
+
+# Time features attached to every pivoted timestamp, in column order
+TEMPORAL_FEATURES = [
+    'hour', 'day_of_week', 'is_weekend',
+    'is_morning', 'is_afternoon', 'is_evening', 'is_night',
+    'hour_sin', 'hour_cos', 'day_sin', 'day_cos',
+    'month_sin', 'month_cos',
+]
+
+# ONNX opset for the CPU export; onnxruntime's int8 LSTM kernel rejects the
+# LSTM layout attribute introduced in opset 14
+ONNX_OPSET = 13
+
+# Device columns each thread should get before rolling stats are split across threads
+MIN_COLUMNS_PER_THREAD = 8
+
+# joblib compression for the pickled scaler and column lists
+MODEL_COMPRESSION = ('lz4', 3)
+
+# Longest look-back (rows) of any rolling or lag feature in prepare_features
+FEATURE_LOOKBACK = 168
+
+
+if NUMBA_AVAILABLE:
+    @njit(parallel=True, fastmath=True)
+    def _rolling_mean_online(values, window):
+        """
+        Trailing mean over `window` rows (min_periods=1) for each column of a
+        NaN-free 2D array, kept as a running sum so the cost does not grow
+        with the window. Columns are processed in parallel.
+        """
+        n_rows, n_cols = values.shape
+        out = np.empty((n_rows, n_cols))
+        for j in prange(n_cols):
+            total = 0.0
+            for i in range(n_rows):
+                total += values[i, j]
+                if i >= window:
+                    total -= values[i - window, j]
+                out[i, j] = total / min(i + 1, window)
+        return out
+
+
+def _apply_column_blocks(frame: pd.DataFrame, func) -> pd.DataFrame:
+    """
+    Apply a column-wise frame function to blocks of columns on a thread pool
+    
+    Pandas' rolling kernels release the GIL, so blocks of independent device
+    columns run concurrently. Small frames are handled in the calling thread.
+    
+    Args:
+        frame: Frame whose columns are processed independently
+        func: Function mapping a block of columns to a same-shaped frame
+        
+    Returns:
+        Result of `func` over all columns, in the original column order
+    """
+    n_blocks = min(joblib.cpu_count(), frame.shape[1] // MIN_COLUMNS_PER_THREAD)
+    if n_blocks <= 1:
+        return func(frame)
+    
+    blocks = np.array_split(np.arange(frame.shape[1]), n_blocks)
+    parts = joblib.Parallel(n_jobs=n_blocks, prefer='threads')(
+        joblib.delayed(func)(frame.iloc[:, block]) for block in blocks
+    )
+    return pd.concat(parts, axis=1)
+
+
+def _temporal_features(timestamps: pd.DatetimeIndex) -> pd.DataFrame:
+    """
+    Calendar and cyclical time features for each timestamp
+    
+    Everything is derived from one integer hour count since the epoch and
+    written into a single float32 block.
+    
+    Args:
+        timestamps: Timestamps to encode (wall-clock time if tz-aware)
+        
+    Returns:
+        DataFrame indexed like `timestamps` with TEMPORAL_FEATURES columns
+    """
+    wall_clock = timestamps.tz_localize(None) if timestamps.tz is not None else timestamps
+    values = wall_clock.values
+    hours = values.astype('datetime64[h]').astype(np.int64)
+    hour = hours % 24
+    day_of_week = (hours // 24 + 3) % 7  # 1970-01-01 was a Thursday
+    month = values.astype('datetime64[M]').astype(np.int64) % 12 + 1
+    
+    block = np.empty((len(values), len(TEMPORAL_FEATURES)), dtype=np.float32)
+    block[:, 0] = hour
+    block[:, 1] = day_of_week
+    block[:, 2] = day_of_week >= 5
+    block[:, 3] = (hour >= 6) & (hour <= 11)
+    block[:, 4] = (hour >= 12) & (hour <= 17)
+    block[:, 5] = (hour >= 18) & (hour <= 22)
+    block[:, 6] = (hour < 6) | (hour > 22)
+    
+    # Cyclical encoding for time features
+    hour_angle = 2 * np.pi * hour / 24
+    day_angle = 2 * np.pi * day_of_week / 7
+    month_angle = 2 * np.pi * month / 12
+    block[:, 7] = np.sin(hour_angle)
+    block[:, 8] = np.cos(hour_angle)
+    block[:, 9] = np.sin(day_angle)
+    block[:, 10] = np.cos(day_angle)
+    block[:, 11] = np.sin(month_angle)
+    block[:, 12] = np.cos(month_angle)
+    
+    return pd.DataFrame(block, index=timestamps, columns=TEMPORAL_FEATURES)
+
+
 class BehaviorPredictionModel:
     """
     LSTM-based model for predicting user behavior patterns
@@ -42,8 +175,13 @@ class BehaviorPredictionModel:
         self.scaler = MinMaxScaler()
         self.label_encoder = LabelEncoder()
         self.feature_columns = []
+        self.device_columns = []
         self.device_encoders = {}
         self.is_trained = False
+        self._device_col_idx = None
+        self._infer = None
+        self._mc_forward = None
+        self._onnx_session = None
         
     def build_model(self, input_shape: Tuple[int, int], num_devices: int) -> keras.Model:
         """
@@ -56,13 +194,43 @@ class BehaviorPredictionModel:
         Returns:
             Compiled Keras model
         """
-        model = Sequential([
+        # Build this model's layers under the mixed policy without changing the
+        # policy seen by other Keras models in the process
+        previous_policy = keras.mixed_precision.global_policy()
+        if MIXED_PRECISION:
+            keras.mixed_precision.set_global_policy('mixed_float16')
+        try:
+            model = self._build_layers(input_shape, num_devices)
+        finally:
+            keras.mixed_precision.set_global_policy(previous_policy)
+        
+        optimizer = keras.optimizers.Adam(learning_rate=0.001)
+        if MIXED_PRECISION:
+            # Scale the loss so float16 gradients do not underflow
+            optimizer = keras.mixed_precision.LossScaleOptimizer(optimizer)
+        
+        # Compile model
+        model.compile(
+            optimizer=optimizer,
+            loss='binary_crossentropy',
+            metrics=['accuracy', 'precision', 'recall']
+        )
+        
+        logger.info(f"Model built with input shape: {input_shape}, output size: {num_devices * self.prediction_horizon}")
+        return model
+    
+    def _build_layers(self, input_shape: Tuple[int, int], num_devices: int) -> keras.Model:
+        """Stack the LSTM and dense layers using the current Keras dtype policy"""
+        # LSTMs keep the default tanh/sigmoid activations, no unrolling and no
+        # recurrent dropout so Keras can dispatch them to the fused cuDNN kernel;
+        # regularization comes from the input dropout and the Dropout layers
+        return Sequential([
             # First LSTM layer with return sequences
             Bidirectional(LSTM(
                 units=128,
                 return_sequences=True,
                 dropout=0.2,
-                recurrent_dropout=0.2
+                recurrent_dropout=0.0
             ), input_shape=input_shape),
             
             # Second LSTM layer
@@ -70,14 +238,14 @@ class BehaviorPredictionModel:
                 units=64,
                 return_sequences=True,
                 dropout=0.2,
-                recurrent_dropout=0.2
+                recurrent_dropout=0.0
             )),
             
             # Third LSTM layer
             LSTM(
                 units=32,
                 dropout=0.2,
-                recurrent_dropout=0.2
+                recurrent_dropout=0.0
             ),
             
             # Dense layers
@@ -86,19 +254,10 @@ class BehaviorPredictionModel:
             Dense(32, activation='relu'),
             Dropout(0.2),
             
-            # Output layer - predict device states for next 24 hours
-            Dense(num_devices * self.prediction_horizon, activation='sigmoid'),
+            # Output layer - predict device states for next 24 hours; kept in
+            # float32 so the sigmoid and cross-entropy stay numerically stable
+            Dense(num_devices * self.prediction_horizon, activation='sigmoid', dtype='float32'),
         ])
-        
-        # Compile model
-        model.compile(
-            optimizer=keras.optimizers.Adam(learning_rate=0.001),
-            loss='binary_crossentropy',
-            metrics=['accuracy', 'precision', 'recall']
-        )
-        
-        logger.info(f"Model built with input shape: {input_shape}, output size: {num_devices * self.prediction_horizon}")
-        return model
     
     def prepare_features(self, df: pd.DataFrame) -> pd.DataFrame:
         """
@@ -110,61 +269,68 @@ class BehaviorPredictionModel:
         Returns:
             DataFrame with engineered features
         """
-        df = df.copy()
-        df['timestamp'] = pd.to_datetime(df['timestamp'])
-        df = df.sort_values('timestamp')
-        
-        # Extract temporal features
-        df['hour'] = df['timestamp'].dt.hour
-        df['day_of_week'] = df['timestamp'].dt.dayofweek
-        df['day_of_month'] = df['timestamp'].dt.day
-        df['month'] = df['timestamp'].dt.month
-        df['is_weekend'] = df['day_of_week'].isin([5, 6]).astype(int)
-        df['is_morning'] = df['hour'].between(6, 11).astype(int)
-        df['is_afternoon'] = df['hour'].between(12, 17).astype(int)
-        df['is_evening'] = df['hour'].between(18, 22).astype(int)
-        df['is_night'] = (~df['hour'].between(6, 22)).astype(int)
-        
-        # Cyclical encoding for time features
-        df['hour_sin'] = np.sin(2 * np.pi * df['hour'] / 24)
-        df['hour_cos'] = np.cos(2 * np.pi * df['hour'] / 24)
-        df['day_sin'] = np.sin(2 * np.pi * df['day_of_week'] / 7)
-        df['day_cos'] = np.cos(2 * np.pi * df['day_of_week'] / 7)
-        df['month_sin'] = np.sin(2 * np.pi * df['month'] / 12)
-        df['month_cos'] = np.cos(2 * np.pi * df['month'] / 12)
-        
-        # Pivot device states
-        device_pivot = df.pivot_table(
-            index='timestamp',
-            columns='device_id',
-            values='state',
-            aggfunc='last',
-            fill_value=0
+        # Already-parsed, time-ordered input (the usual predict buffer) is read
+        # as is; the frame is never mutated below, so no copy is needed
+        timestamps = df['timestamp']
+        if not (is_datetime64_any_dtype(timestamps) and timestamps.is_monotonic_increasing):
+            df = df.copy()
+            df['timestamp'] = pd.to_datetime(timestamps)
+            df = df.sort_values('timestamp')
+        
+        # Pivot device states (last state per timestamp and device)
+        device_pivot = (
+            df.groupby(['timestamp', 'device_id'])['state']
+            .last()
+            .unstack('device_id', fill_value=0)
         )
         
-        # Merge temporal features
-        temporal_features = df[['timestamp', 'hour', 'day_of_week', 'is_weekend',
-                                'is_morning', 'is_afternoon', 'is_evening', 'is_night',
-                                'hour_sin', 'hour_cos', 'day_sin', 'day_cos',
-                                'month_sin', 'month_cos']].drop_duplicates('timestamp')
+        # Temporal features, computed once per pivoted timestamp
+        temporal_features = _temporal_features(device_pivot.index)
         
-        result = device_pivot.merge(temporal_features, on='timestamp', how='left')
-        result = result.sort_values('timestamp')
+        result = pd.concat([device_pivot, temporal_features], axis=1).reset_index()
         
-        # Add rolling statistics
-        for col in device_pivot.columns:
-            result[f'{col}_rolling_mean_24h'] = result[col].rolling(window=24, min_periods=1).mean()
-            result[f'{col}_rolling_std_24h'] = result[col].rolling(window=24, min_periods=1).std().fillna(0)
-            result[f'{col}_rolling_mean_168h'] = result[col].rolling(window=168, min_periods=1).mean()
+        # Rolling statistics and lags computed over all device columns at once
+        device_states = result[device_pivot.columns]
+        if NUMBA_AVAILABLE:
+            # The pivot is zero-filled, so the running-sum kernel needs no NaN handling
+            states = np.asfortranarray(device_states.to_numpy(dtype=np.float64))
+            rolling_mean_24h = pd.DataFrame(
+                _rolling_mean_online(states, 24), index=result.index, columns=device_pivot.columns
+            )
+            rolling_mean_168h = pd.DataFrame(
+                _rolling_mean_online(states, 168), index=result.index, columns=device_pivot.columns
+            )
+        else:
+            rolling_mean_24h = _apply_column_blocks(
+                device_states, lambda block: block.rolling(window=24, min_periods=1).mean()
+            )
+            rolling_mean_168h = _apply_column_blocks(
+                device_states, lambda block: block.rolling(window=168, min_periods=1).mean()
+            )
+        rolling_std_24h = _apply_column_blocks(
+            device_states, lambda block: block.rolling(window=24, min_periods=1).std().fillna(0)
+        )
+        lag_1h = device_states.shift(1).fillna(0)
+        lag_24h = device_states.shift(24).fillna(0)
+        lag_168h = device_states.shift(168).fillna(0)
         
-        # Add lag features
+        # Attach them in one concat, keeping the per-device column order
+        derived = {}
         for col in device_pivot.columns:
-            result[f'{col}_lag_1h'] = result[col].shift(1).fillna(0)
-            result[f'{col}_lag_24h'] = result[col].shift(24).fillna(0)
-            result[f'{col}_lag_168h'] = result[col].shift(168).fillna(0)
+            derived[f'{col}_rolling_mean_24h'] = rolling_mean_24h[col]
+            derived[f'{col}_rolling_std_24h'] = rolling_std_24h[col]
+            derived[f'{col}_rolling_mean_168h'] = rolling_mean_168h[col]
+        for col in device_pivot.columns:
+            derived[f'{col}_lag_1h'] = lag_1h[col]
+            derived[f'{col}_lag_24h'] = lag_24h[col]
+            derived[f'{col}_lag_168h'] = lag_168h[col]
+        result = pd.concat([result, pd.DataFrame(derived, index=result.index)], axis=1)
         
         self.feature_columns = [col for col in result.columns if col != 'timestamp']
         
+        # The LSTM consumes float32, so keep features at half the bytes from here on
+        result = result.astype({col: np.float32 for col in self.feature_columns})
+        
         logger.info(f"Prepared {len(self.feature_columns)} features from raw data")
         return result
     
@@ -177,17 +343,27 @@ class BehaviorPredictionModel:
             target: Target array
             
         Returns:
-            Tuple of (X, y) sequences
+            Tuple of (X, y) sequences as read-only float32 views over the inputs
         """
-        X, y = [], []
+        data = np.asarray(data, dtype=np.float32)
+        target = np.asarray(target, dtype=np.float32)
+        num_sequences = len(data) - self.sequence_length - self.prediction_horizon + 1
+        if num_sequences <= 0:
+            return (
+                np.empty((0, self.sequence_length, data.shape[1]), dtype=np.float32),
+                np.empty((0, self.prediction_horizon, target.shape[1]), dtype=np.float32)
+            )
         
-        for i in range(len(data) - self.sequence_length - self.prediction_horizon + 1):
-            X.append(data[i:i + self.sequence_length])
-            y.append(target[i + self.sequence_length:i + self.sequence_length + self.prediction_horizon])
+        # Zero-copy rolling windows; sequence i covers rows [i, i + sequence_length)
+        # and its target the prediction_horizon rows that follow
+        X = sliding_window_view(data, (self.sequence_length, data.shape[1]))[:num_sequences, 0]
+        y = sliding_window_view(
+            target[self.sequence_length:], (self.prediction_horizon, target.shape[1])
+        )[:, 0]
         
-        return np.array(X), np.array(y)
+        return X, y
     
-    def train(self, df: pd.DataFrame, validation_split: float = 0.2, epochs: int = 100, batch_size: int = 32):
+    def train(self, df: pd.DataFrame, validation_split: float = 0.2, epochs: int = 100, batch_size: int = 64):
         """
         Train the behavior prediction model
         
@@ -202,13 +378,13 @@ class BehaviorPredictionModel:
         # Prepare features
         features_df = self.prepare_features(df)
         
-        # Get device columns
-        device_columns = [col for col in features_df.columns if col.startswith('device_')]
-        device_columns = [col for col in device_columns if not any(x in col for x in ['rolling', 'lag'])]
+        # Get device columns once; predictions reuse them
+        self._set_device_columns(self._find_device_columns(features_df.columns))
+        device_columns = self.device_columns
         
         # Prepare data
-        X_data = features_df[self.feature_columns].values
-        y_data = features_df[device_columns].values
+        X_data = features_df[self.feature_columns].to_numpy(dtype=np.float32)
+        y_data = X_data[:, self._device_col_idx]
         
         # Scale features
         X_scaled = self.scaler.fit_transform(X_data)
@@ -219,15 +395,17 @@ class BehaviorPredictionModel:
         # Flatten y for prediction
         y_seq = y_seq.reshape(y_seq.shape[0], -1)
         
-        # Split data
-        X_train, X_val, y_train, y_val = train_test_split(
-            X_seq, y_seq, test_size=validation_split, shuffle=False
-        )
+        # Split data chronologically; slicing keeps the sequence views uncopied
+        split = len(X_seq) - int(np.ceil(validation_split * len(X_seq)))
+        X_train, X_val = X_seq[:split], X_seq[split:]
+        y_train, y_val = y_seq[:split], y_seq[split:]
         
         logger.info(f"Training data shape: X={X_train.shape}, y={y_train.shape}")
         logger.info(f"Validation data shape: X={X_val.shape}, y={y_val.shape}")
         
         # Build model
+        self._infer = None
+        self._mc_forward = None
         self.model = self.build_model(
             input_shape=(X_train.shape[1], X_train.shape[2]),
             num_devices=len(device_columns)
@@ -256,12 +434,27 @@ class BehaviorPredictionModel:
             )
         ]
         
+        # Input pipelines: batches are prepared on the host while the previous
+        # step runs, and the validation batches are built only once
+        train_ds = (
+            tf.data.Dataset.from_tensor_slices((X_train, y_train))
+            .cache()
+            .shuffle(min(len(X_train), SHUFFLE_BUFFER_SIZE))
+            .batch(batch_size)
+            .prefetch(tf.data.AUTOTUNE)
+        )
+        val_ds = (
+            tf.data.Dataset.from_tensor_slices((X_val, y_val))
+            .batch(batch_size)
+            .cache()
+            .prefetch(tf.data.AUTOTUNE)
+        )
+        
         # Train model
         history = self.model.fit(
-            X_train, y_train,
-            validation_data=(X_val, y_val),
+            train_ds,
+            validation_data=val_ds,
             epochs=epochs,
-            batch_size=batch_size,
             callbacks=callbacks,
             verbose=1
         )
@@ -269,8 +462,8 @@ class BehaviorPredictionModel:
         self.is_trained = True
         
         # Evaluate
-        train_loss, train_acc, train_prec, train_rec = self.model.evaluate(X_train, y_train, verbose=0)
-        val_loss, val_acc, val_prec, val_rec = self.model.evaluate(X_val, y_val, verbose=0)
+        train_loss, train_acc, train_prec, train_rec = self.model.evaluate(X_train, y_train, batch_size=batch_size, verbose=0)
+        val_loss, val_acc, val_prec, val_rec = self.model.evaluate(val_ds, verbose=0)
         
         logger.info(f"Training - Loss: {train_loss:.4f}, Accuracy: {train_acc:.4f}, Precision: {train_prec:.4f}, Recall: {train_rec:.4f}")
         logger.info(f"Validation - Loss: {val_loss:.4f}, Accuracy: {val_acc:.4f}, Precision: {val_prec:.4f}, Recall: {val_rec:.4f}")
@@ -290,21 +483,15 @@ class BehaviorPredictionModel:
         if not self.is_trained:
             raise ValueError("Model must be trained before making predictions")
         
-        # Prepare features
-        features_df = self.prepare_features(recent_data)
-        
-        # Get last sequence
-        X_data = features_df[self.feature_columns].values[-self.sequence_length:]
-        X_scaled = self.scaler.transform(X_data)
+        # Prepare features for the last sequence
+        X_scaled = self._prepare_last_sequence(recent_data)
         X_seq = X_scaled.reshape(1, self.sequence_length, -1)
         
         # Predict
-        predictions = self.model.predict(X_seq, verbose=0)
+        predictions = self._get_infer()(tf.constant(X_seq, dtype=tf.float32)).numpy()
         
         # Reshape predictions
-        device_columns = [col for col in features_df.columns if col.startswith('device_')]
-        device_columns = [col for col in device_columns if not any(x in col for x in ['rolling', 'lag'])]
-        
+        device_columns = self.device_columns
         predictions = predictions.reshape(len(device_columns), self.prediction_horizon)
         
         # Create result dictionary
@@ -314,6 +501,28 @@ class BehaviorPredictionModel:
         
         return result
     
+    def predict_onnx(self, recent_data: pd.DataFrame) -> Dict[str, List[float]]:
+        """
+        Predict device states with the int8 ONNX export instead of TensorFlow
+        
+        Args:
+            recent_data: Recent device usage data (at least sequence_length hours)
+            
+        Returns:
+            Dictionary mapping device IDs to predicted states for next 24 hours
+        """
+        if self._onnx_session is None:
+            raise ValueError("No ONNX model loaded; save and load the model with onnxruntime installed")
+        
+        X_scaled = self._prepare_last_sequence(recent_data)
+        X_seq = X_scaled.reshape(1, self.sequence_length, -1).astype(np.float32)
+        
+        input_name = self._onnx_session.get_inputs()[0].name
+        predictions = self._onnx_session.run(None, {input_name: X_seq})[0]
+        predictions = predictions.reshape(len(self.device_columns), self.prediction_horizon)
+        
+        return {device_id: predictions[i].tolist() for i, device_id in enumerate(self.device_columns)}
+    
     def predict_with_confidence(self, recent_data: pd.DataFrame, num_samples: int = 10) -> Dict[str, Dict]:
         """
         Predict device states with confidence intervals using Monte Carlo dropout
@@ -329,22 +538,14 @@ class BehaviorPredictionModel:
             raise ValueError("Model must be trained before making predictions")
         
         # Prepare features
-        features_df = self.prepare_features(recent_data)
-        X_data = features_df[self.feature_columns].values[-self.sequence_length:]
-        X_scaled = self.scaler.transform(X_data)
+        X_scaled = self._prepare_last_sequence(recent_data)
         X_seq = X_scaled.reshape(1, self.sequence_length, -1)
         
-        # Get device columns
-        device_columns = [col for col in features_df.columns if col.startswith('device_')]
-        device_columns = [col for col in device_columns if not any(x in col for x in ['rolling', 'lag'])]
-        
-        # Monte Carlo sampling
-        predictions = []
-        for _ in range(num_samples):
-            pred = self.model.predict(X_seq, verbose=0)
-            predictions.append(pred)
+        device_columns = self.device_columns
         
-        predictions = np.array(predictions)
+        # Monte Carlo sampling: all samples in one batched pass with dropout active
+        X_batch = np.repeat(X_seq.astype(np.float32), num_samples, axis=0)
+        predictions = self._get_mc_forward()(tf.constant(X_batch)).numpy()
         
         # Calculate statistics
         mean_pred = predictions.mean(axis=0)
@@ -367,6 +568,72 @@ class BehaviorPredictionModel:
         
         return result
     
+    def _prepare_last_sequence(self, recent_data: pd.DataFrame) -> np.ndarray:
+        """
+        Scaled features for the last sequence_length timestamps
+        
+        Only the rows those timestamps depend on (sequence_length plus the
+        longest rolling/lag window) are run through prepare_features, so
+        long histories cost the same as a short one.
+        
+        Args:
+            recent_data: Recent device usage data
+            
+        Returns:
+            Scaled feature matrix of shape (sequence_length, n_features)
+        """
+        timestamps = pd.to_datetime(recent_data['timestamp'])
+        unique_timestamps = timestamps.drop_duplicates()
+        needed = self.sequence_length + FEATURE_LOOKBACK
+        if len(unique_timestamps) > needed:
+            cutoff = unique_timestamps.nlargest(needed).iloc[-1]
+            recent_data = recent_data[timestamps >= cutoff]
+        
+        # prepare_features overwrites feature_columns; keep the trained layout
+        feature_columns = self.feature_columns
+        features_df = self.prepare_features(recent_data)
+        self.feature_columns = feature_columns
+        
+        X_data = features_df.reindex(columns=feature_columns, fill_value=0).values[-self.sequence_length:]
+        return self.scaler.transform(X_data)
+    
+    @staticmethod
+    def _find_device_columns(columns) -> List[str]:
+        """Raw device state columns, excluding their rolling and lag features"""
+        return [
+            col for col in columns
+            if col.startswith('device_') and not any(x in col for x in ['rolling', 'lag'])
+        ]
+    
+    def _set_device_columns(self, device_columns: List[str]):
+        """Cache device columns and their positions within feature_columns"""
+        self.device_columns = list(device_columns)
+        positions = {col: i for i, col in enumerate(self.feature_columns)}
+        self._device_col_idx = np.array([positions[col] for col in self.device_columns], dtype=np.intp)
+    
+    def _get_infer(self):
+        """
+        Compiled inference pass, traced once per model so single-window
+        predictions skip the per-call setup of Keras' predict
+        """
+        if self._infer is None:
+            model = self.model
+            self._infer = tf.function(
+                lambda x: model(x, training=False),
+                input_signature=[tf.TensorSpec([None, self.sequence_length, None], tf.float32)]
+            )
+        return self._infer
+    
+    def _get_mc_forward(self):
+        """
+        Compiled forward pass with dropout enabled, traced once per model
+        instead of going through Keras' predict loop for every sample
+        """
+        if self._mc_forward is None:
+            model = self.model
+            self._mc_forward = tf.function(lambda x: model(x, training=True), reduce_retracing=True)
+        return self._mc_forward
+    
     def detect_patterns(self, df: pd.DataFrame, confidence_threshold: float = 0.8) -> List[Dict]:
         """
         Detect recurring behavior patterns
@@ -379,31 +646,31 @@ class BehaviorPredictionModel:
             List of detected patterns
         """
         patterns = []
-        
-        # Group by hour and day of week
-        df['hour'] = pd.to_datetime(df['timestamp']).dt.hour
-        df['day_of_week'] = pd.to_datetime(df['timestamp']).dt.dayofweek
-        
-        # Analyze patterns for each device
-        for device_id in df['device_id'].unique():
-            device_data = df[df['device_id'] == device_id]
-            
-            # Find frequent activation times
-            activation_times = device_data[device_data['state'] == 1].groupby(['day_of_week', 'hour']).size()
-            total_occurrences = device_data.groupby(['day_of_week', 'hour']).size()
-            
-            activation_rate = activation_times / total_occurrences
-            frequent_patterns = activation_rate[activation_rate >= confidence_threshold]
-            
-            for (day, hour), confidence in frequent_patterns.items():
-                patterns.append({
-                    'device_id': device_id,
-                    'day_of_week': int(day),
-                    'hour': int(hour),
-                    'confidence': float(confidence),
-                    'type': 'recurring_activation',
-                    'description': f"Device {device_id} is typically activated on {['Mon','Tue','Wed','Thu','Fri','Sat','Sun'][day]} at {hour}:00"
-                })
+        day_names = ['Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun']
+        
+        # Parse timestamps once; devices keep their order of first appearance
+        timestamps = pd.to_datetime(df['timestamp'])
+        slots = pd.DataFrame({
+            'device_id': pd.Categorical(df['device_id'], categories=df['device_id'].unique()),
+            'day_of_week': timestamps.dt.dayofweek.values,
+            'hour': timestamps.dt.hour.values,
+            'active': (df['state'] == 1).values,
+        })
+        
+        # Activation counts and totals per device, day of week and hour in one pass
+        counts = slots.groupby(['device_id', 'day_of_week', 'hour'], observed=True)['active'].agg(['sum', 'size'])
+        activation_rate = counts['sum'] / counts['size']
+        frequent_patterns = activation_rate[(counts['sum'] > 0) & (activation_rate >= confidence_threshold)]
+        
+        for (device_id, day, hour), confidence in frequent_patterns.items():
+            patterns.append({
+                'device_id': device_id,
+                'day_of_week': int(day),
+                'hour': int(hour),
+                'confidence': float(confidence),
+                'type': 'recurring_activation',
+                'description': f"Device {device_id} is typically activated on {day_names[day]} at {hour}:00"
+            })
         
         logger.info(f"Detected {len(patterns)} behavior patterns")
         return patterns
@@ -452,8 +719,9 @@ class BehaviorPredictionModel:
         self.model.save(f"{path}/behavior_model.h5")
         
         # Save preprocessing objects
-        joblib.dump(self.scaler, f"{path}/scaler.pkl")
-        joblib.dump(self.feature_columns, f"{path}/feature_columns.pkl")
+        joblib.dump(self.scaler, f"{path}/scaler.pkl", compress=MODEL_COMPRESSION)
+        joblib.dump(self.feature_columns, f"{path}/feature_columns.pkl", compress=MODEL_COMPRESSION)
+        joblib.dump(self.device_columns, f"{path}/device_columns.pkl", compress=MODEL_COMPRESSION)
         
         # Save metadata
         metadata = {
@@ -464,16 +732,56 @@ class BehaviorPredictionModel:
         with open(f"{path}/metadata.json", 'w') as f:
             json.dump(metadata, f)
         
+        # The ONNX copy is an optional fast path, exported last so a failed
+        # conversion cannot leave the Keras model files incomplete
+        if ONNX_AVAILABLE:
+            try:
+                self._export_onnx(path)
+            except Exception as e:
+                logger.warning(f"ONNX export failed, inference will use Keras: {e}")
+                # Drop ONNX files from an earlier save; they no longer match
+                for name in ('behavior_model.onnx', 'behavior_model.int8.onnx'):
+                    if os.path.exists(f"{path}/{name}"):
+                        os.remove(f"{path}/{name}")
+        
         logger.info(f"Model saved to {path}")
     
+    def _export_onnx(self, path: str):
+        """Export the model to ONNX and write an int8 dynamically quantized copy"""
+        input_signature = (
+            tf.TensorSpec((None, self.sequence_length, len(self.feature_columns)), tf.float32, name='input'),
+        )
+        tf2onnx.convert.from_keras(
+            self.model,
+            input_signature=input_signature,
+            opset=ONNX_OPSET,
+            output_path=f"{path}/behavior_model.onnx"
+        )
+        quantize_dynamic(
+            model_input=f"{path}/behavior_model.onnx",
+            model_output=f"{path}/behavior_model.int8.onnx",
+            weight_type=QuantType.QInt8
+        )
+    
     def load(self, path: str):
         """Load model and preprocessing objects"""
         # Load model
         self.model = load_model(f"{path}/behavior_model.h5")
+        self._infer = None
+        self._mc_forward = None
+        self._onnx_session = None
+        if ONNX_AVAILABLE and os.path.exists(f"{path}/behavior_model.int8.onnx"):
+            self._onnx_session = ort.InferenceSession(
+                f"{path}/behavior_model.int8.onnx", providers=['CPUExecutionProvider']
+            )
         
         # Load preprocessing objects
         self.scaler = joblib.load(f"{path}/scaler.pkl")
         self.feature_columns = joblib.load(f"{path}/feature_columns.pkl")
+        if os.path.exists(f"{path}/device_columns.pkl"):
+            self._set_device_columns(joblib.load(f"{path}/device_columns.pkl"))
+        else:
+            self._set_device_columns(self._find_device_columns(self.feature_columns))
         
         # Load metadata
         with open(f"{path}/metadata.json", 'r') as f:
@@ -499,7 +807,8 @@ class OccupancyPredictionModel:
             max_depth=10,
             min_samples_split=5,
             min_samples_leaf=2,
-            random_state=42
+            random_state=42,
+            n_jobs=-1
         )
         self.scaler = MinMaxScaler()
         self.feature_columns = []
@@ -533,9 +842,14 @@ class OccupancyPredictionModel:
             'sound_level': 'mean',
         }).reset_index()
         
-        # Add rolling features
-        for col in ['motion_detected', 'door_opened', 'sound_level']:
-            features[f'{col}_rolling_mean'] = features.groupby('room_id')[col].rolling(window=6, min_periods=1).mean().reset_index(0, drop=True)
+        # Add rolling features, all columns in a single per-room pass
+        rolling_cols = ['motion_detected', 'door_opened', 'sound_level']
+        rolling_means = (
+            features.groupby('room_id', sort=False)[rolling_cols]
+            .rolling(window=6, min_periods=1).mean()
+            .reset_index(level=0, drop=True)
+        )
+        features = features.join(rolling_means.add_suffix('_rolling_mean'))
         
         self.feature_columns = [col for col in features.columns if col not in ['room_id', 'timestamp', 'occupied']]
         
@@ -583,7 +897,9 @@ class OccupancyPredictionModel:
         
         features_df = self.prepare_features(sensor_data)
         X = features_df[self.feature_columns].values
-        X_scaled = self.scaler.transform(X)
+        # The forest works in float32 internally; hand it a contiguous block
+        # so predict_proba does not make its own copy
+        X_scaled = np.ascontiguousarray(self.scaler.transform(X), dtype=np.float32)
         
         probabilities = self.model.predict_proba(X_scaled)[:, 1]
         
@@ -1,22 +1,27 @@
 import numpy as np
 import pandas as pd
-from sklearn.ensemble import RandomForestRegressor
-from sklearn.preprocessing import StandardScaler
+from sklearn.ensemble import HistGradientBoostingRegressor
+from sklearn.multioutput import MultiOutputRegressor
+from sklearn.metrics import r2_score
 import joblib
 import logging
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Compression for the saved model file; joblib detects it again on load
+MODEL_COMPRESSION = ('lz4', 3)
+
 class ComfortOptimizationModel:
     """ML model for optimizing home comfort based on user preferences and environmental factors"""
     
     def __init__(self, model_path='models/comfort_optimization.pkl'):
         self.model_path = model_path
-        self.temperature_model = None
-        self.lighting_model = None
-        self.scaler = StandardScaler()
+        self.model = None
         self.feature_names = []
+        # Separate temperature/lighting forests and scaler of a model file
+        # saved before the multi-output model, kept so it still predicts
+        self._legacy_models = None
         
     def prepare_features(self, df):
         """Prepare features for comfort optimization"""
@@ -59,35 +64,26 @@ class ComfortOptimizationModel:
         X = self.prepare_features(df)
         y_temperature = df['optimal_temperature']
         y_lighting = df['optimal_brightness']
-        
-        # Scale features
-        X_scaled = self.scaler.fit_transform(X)
-        
-        # Train temperature model
-        logger.info("Training temperature optimization model")
-        self.temperature_model = RandomForestRegressor(
-            n_estimators=200,
-            max_depth=15,
-            min_samples_split=10,
-            random_state=42,
-            n_jobs=-1
-        )
-        self.temperature_model.fit(X_scaled, y_temperature)
-        
-        # Train lighting model
-        logger.info("Training lighting optimization model")
-        self.lighting_model = RandomForestRegressor(
-            n_estimators=200,
-            max_depth=15,
-            min_samples_split=10,
-            random_state=42,
-            n_jobs=-1
-        )
-        self.lighting_model.fit(X_scaled, y_lighting)
+        y = np.column_stack([y_temperature, y_lighting])
+        
+        # Histogram gradient boosting bins each feature into at most 255
+        # buckets, so no feature scaling is needed. It is single-output, so
+        # one booster is fitted per target; each already uses all cores
+        logger.info("Training temperature and lighting optimization model")
+        self.model = MultiOutputRegressor(HistGradientBoostingRegressor(
+            max_iter=200,
+            max_depth=8,
+            learning_rate=0.05,
+            early_stopping=True,
+            random_state=42
+        ))
+        self.model.fit(X, y)
+        self._legacy_models = None
         
         # Evaluate models
-        temp_score = self.temperature_model.score(X_scaled, y_temperature)
-        light_score = self.lighting_model.score(X_scaled, y_lighting)
+        y_pred = self.model.predict(X)
+        temp_score = r2_score(y_temperature, y_pred[:, 0])
+        light_score = r2_score(y_lighting, y_pred[:, 1])
         
         logger.info(f"Temperature Model R² Score: {temp_score:.4f}")
         logger.info(f"Lighting Model R² Score: {light_score:.4f}")
@@ -99,35 +95,49 @@ class ComfortOptimizationModel:
     
     def predict_optimal_settings(self, features):
         """Predict optimal temperature and lighting settings"""
-        if self.temperature_model is None or self.lighting_model is None:
+        if self._legacy_models is not None:
+            features_scaled = self._legacy_models['scaler'].transform(features)
+            return {
+                'temperature': self._legacy_models['temperature_model'].predict(features_scaled),
+                'brightness': self._legacy_models['lighting_model'].predict(features_scaled)
+            }
+        if self.model is None:
             raise ValueError("Models not trained")
         
-        features_scaled = self.scaler.transform(features)
-        
-        optimal_temperature = self.temperature_model.predict(features_scaled)
-        optimal_brightness = self.lighting_model.predict(features_scaled)
+        predictions = self.model.predict(features)
         
         return {
-            'temperature': optimal_temperature,
-            'brightness': optimal_brightness
+            'temperature': predictions[:, 0],
+            'brightness': predictions[:, 1]
         }
     
     def save_model(self):
         """Save trained models"""
-        model_data = {
-            'temperature_model': self.temperature_model,
-            'lighting_model': self.lighting_model,
-            'scaler': self.scaler,
-            'feature_names': self.feature_names
-        }
-        joblib.dump(model_data, self.model_path)
+        if self._legacy_models is not None:
+            model_data = dict(self._legacy_models, feature_names=self.feature_names)
+        else:
+            model_data = {
+                'model': self.model,
+                'feature_names': self.feature_names
+            }
+        joblib.dump(model_data, self.model_path, compress=MODEL_COMPRESSION)
         logger.info(f"Models saved to {self.model_path}")
     
     def load_model(self):
         """Load trained models"""
         model_data = joblib.load(self.model_path)
-        self.temperature_model = model_data['temperature_model']
-        self.lighting_model = model_data['lighting_model']
-        self.scaler = model_data['scaler']
         self.feature_names = model_data['feature_names']
+        if 'model' in model_data:
+            self.model = model_data['model']
+            self._legacy_models = None
+        elif all(key in model_data for key in ('temperature_model', 'lighting_model', 'scaler')):
+            # Older files hold one forest per target on scaled features
+            self.model = None
+            self._legacy_models = {
+                key: model_data[key] for key in ('temperature_model', 'lighting_model', 'scaler')
+            }
+        else:
+            raise ValueError(
+                f"Unrecognized comfort model file {self.model_path}; retrain required"
+            )
         logger.info(f"Models loaded from {self.model_path}")
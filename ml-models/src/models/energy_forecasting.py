@@ -1,17 +1,366 @@
 import numpy as np
 import pandas as pd
-from sklearn.ensemble import RandomForestRegressor, GradientBoostingRegressor
+from sklearn.ensemble import RandomForestRegressor, HistGradientBoostingRegressor
 from sklearn.preprocessing import StandardScaler
-from sklearn.model_selection import train_test_split, cross_val_score
+from sklearn.model_selection import train_test_split, cross_val_score, TimeSeriesSplit
 from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
 from typing import Dict, List, Tuple, Optional
 import joblib
 import logging
+import os
+import shutil
+import tempfile
 from datetime import datetime, timedelta
 
+try:
+    from numba import njit, prange
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+try:
+    import lightgbm as lgb
+    LIGHTGBM_AVAILABLE = True
+except ImportError:
+    LIGHTGBM_AVAILABLE = False
+
+try:
+    import treelite
+    import tl2cgen
+    TREELITE_AVAILABLE = True
+except ImportError:
+    TREELITE_AVAILABLE = False
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Angle per unit of the hour, day-of-week and month cycles
+TWO_PI_OVER_24 = 2 * np.pi / 24
+TWO_PI_OVER_7 = 2 * np.pi / 7
+TWO_PI_OVER_12 = 2 * np.pi / 12
+
+# Nanoseconds per hour and per day, for calendar fields of int64 timestamps
+NS_PER_HOUR = 3_600_000_000_000
+NS_PER_DAY = 24 * NS_PER_HOUR
+
+# Cyclical time encodings, in the column order of _cyclical_encodings
+CYCLICAL_FEATURES = ['hour_sin', 'hour_cos', 'day_sin', 'day_cos', 'month_sin', 'month_cos']
+
+# Lags (hours) of the energy lag features
+LAG_HOURS = (1, 2, 3, 6, 12, 24)
+
+# Windows (hours) of the energy rolling mean/std/max/min features
+ROLLING_WINDOWS = (3, 6, 12, 24)
+
+# Spans of the energy exponential moving averages and their smoothing factors
+EMA_SPANS = (12, 24)
+EMA_ALPHAS = 2.0 / (np.array(EMA_SPANS, dtype=np.float64) + 1.0)
+
+# Energy values a single forecast step looks back over, current hour included
+ENERGY_TAIL = max(max(LAG_HOURS), max(ROLLING_WINDOWS)) + 1
+
+# Window of the power and temperature rolling means
+EXOG_WINDOW = 6
+
+# Exogenous columns held at their last known value unless external features give them
+EXOG_COLUMNS = ('power', 'temperature', 'humidity', 'active_devices', 'occupancy')
+
+# Model types whose predictions do not depend on feature scaling
+TREE_MODEL_TYPES = ('random_forest', 'gradient_boosting', 'lightgbm')
+
+# Compression of saved models; a forest's node arrays shrink several times
+# under lz4 at little cost to load time
+MODEL_COMPRESSION = ('lz4', 3)
+
+
+def _predictor_libpath(filepath: str) -> str:
+    """Path of the compiled forest saved alongside the model at `filepath`."""
+    return f"{filepath}.so"
+
+
+if NUMBA_AVAILABLE:
+    @njit(parallel=True)
+    def _rolling_all(x, windows):
+        """
+        Rolling mean, std, max and min of `x` for every window in one sweep each.
+
+        Returns an array of shape (len(x), 4 * len(windows)) with the four
+        statistics of each window in that order. Semantics follow pandas'
+        rolling(window, min_periods=1): NaNs are skipped, the std uses
+        ddof=1 and is NaN for single observations. Mean and variance are kept
+        as running sums; max and min use monotonic index deques held in ring
+        buffers, so each step is O(1) amortized. Windows run in parallel.
+        """
+        n = x.shape[0]
+        out = np.empty((n, 4 * windows.shape[0]))
+        for k in prange(windows.shape[0]):
+            w = windows[k]
+            max_buf = np.empty(w, np.int64)
+            min_buf = np.empty(w, np.int64)
+            max_head = max_len = min_head = min_len = 0
+            nobs = neg_ct = same_ct = 0
+            total = mean = ssqdm = 0.0
+            prev_value = np.nan
+            for i in range(n):
+                # Drop the value leaving the window
+                if i >= w:
+                    old = x[i - w]
+                    if not np.isnan(old):
+                        nobs -= 1
+                        total -= old
+                        if old < 0:
+                            neg_ct -= 1
+                        if nobs > 0:
+                            delta = old - mean
+                            mean -= delta / nobs
+                            ssqdm -= ((nobs + 1) * delta * delta) / nobs
+                        else:
+                            mean = ssqdm = 0.0
+                    if max_len > 0 and max_buf[max_head] == i - w:
+                        max_head = (max_head + 1) % w
+                        max_len -= 1
+                    if min_len > 0 and min_buf[min_head] == i - w:
+                        min_head = (min_head + 1) % w
+                        min_len -= 1
+
+                # Add the new value
+                val = x[i]
+                if not np.isnan(val):
+                    nobs += 1
+                    total += val
+                    if val < 0:
+                        neg_ct += 1
+                    same_ct = same_ct + 1 if val == prev_value else 1
+                    prev_value = val
+                    delta = val - mean
+                    mean += delta / nobs
+                    ssqdm += ((nobs - 1) * delta * delta) / nobs
+                    while max_len > 0 and x[max_buf[(max_head + max_len - 1) % w]] <= val:
+                        max_len -= 1
+                    max_buf[(max_head + max_len) % w] = i
+                    max_len += 1
+                    while min_len > 0 and x[min_buf[(min_head + min_len - 1) % w]] >= val:
+                        min_len -= 1
+                    min_buf[(min_head + min_len) % w] = i
+                    min_len += 1
+
+                col = 4 * k
+                if nobs == 0:
+                    out[i, col] = np.nan
+                    out[i, col + 1] = np.nan
+                    out[i, col + 2] = np.nan
+                    out[i, col + 3] = np.nan
+                    continue
+
+                # A run of identical values is reported exactly, as pandas does
+                if same_ct >= nobs:
+                    out[i, col] = prev_value
+                else:
+                    result = total / nobs
+                    if neg_ct == 0 and result < 0:
+                        result = 0.0
+                    elif neg_ct == nobs and result > 0:
+                        result = 0.0
+                    out[i, col] = result
+
+                if nobs == 1:
+                    out[i, col + 1] = np.nan
+                elif same_ct >= nobs or ssqdm <= 0:
+                    out[i, col + 1] = 0.0
+                else:
+                    out[i, col + 1] = np.sqrt(ssqdm / (nobs - 1))
+
+                out[i, col + 2] = x[max_buf[max_head]]
+                out[i, col + 3] = x[min_buf[min_head]]
+        return out
+
+    @njit
+    def _ewm(x, alphas):
+        """
+        Exponentially weighted mean of `x` for every smoothing factor in
+        `alphas`, as pandas' ewm(alpha=a, adjust=False).mean().
+
+        Returns an array of shape (len(x), len(alphas)). Leading NaNs stay
+        NaN, and a NaN input repeats the previous mean while its weight keeps
+        decaying, like pandas with ignore_na=False.
+        """
+        n = x.shape[0]
+        out = np.empty((n, alphas.shape[0]))
+        if n == 0:
+            return out
+        for k in range(alphas.shape[0]):
+            alpha = alphas[k]
+            weighted = x[0]
+            old_wt = 1.0
+            out[0, k] = weighted
+            for i in range(1, n):
+                cur = x[i]
+                if weighted == weighted:
+                    old_wt *= 1.0 - alpha
+                    if cur == cur:
+                        if weighted != cur:
+                            weighted = (old_wt * weighted + alpha * cur) / (old_wt + alpha)
+                        old_wt = 1.0
+                elif cur == cur:
+                    weighted = cur
+                out[i, k] = weighted
+        return out
+
+
+def _energy_emas(energy: np.ndarray) -> np.ndarray:
+    """
+    Energy EMA of every span in EMA_SPANS.
+    
+    Args:
+        energy: float64 energy series
+        
+    Returns:
+        Array of shape (len(energy), len(EMA_SPANS))
+    """
+    if NUMBA_AVAILABLE:
+        return _ewm(energy, EMA_ALPHAS)
+    series = pd.Series(energy)
+    return np.column_stack([series.ewm(span=span, adjust=False).mean().to_numpy() for span in EMA_SPANS])
+
+
+def _ewm_step(state: np.ndarray, value: float, alpha: np.ndarray) -> np.ndarray:
+    """
+    Advance adjust=False EWM means by one observation.
+    
+    Args:
+        state: Current means
+        value: New observation
+        alpha: Smoothing factor of each mean
+        
+    Returns:
+        Updated means
+    """
+    old_wt = 1.0 - alpha
+    return (old_wt * state + alpha * value) / (old_wt + alpha)
+
+
+
+def _calendar_fields(timestamps: pd.Series) -> Dict[str, np.ndarray]:
+    """
+    Calendar fields computed with integer arithmetic on the int64 nanosecond
+    representation rather than through the .dt accessor.
+    
+    Args:
+        timestamps: datetime64 series; tz-aware values use their wall-clock time
+        
+    Returns:
+        Dictionary with 'hour', 'day_of_week' (Monday=0), 'day_of_month',
+        'month' and 'quarter' arrays
+    """
+    if timestamps.dt.tz is not None:
+        timestamps = timestamps.dt.tz_localize(None)
+    if timestamps.isna().any():
+        # NaT has no integer form; keep the accessor's NaN results
+        return {
+            'hour': timestamps.dt.hour.to_numpy(),
+            'day_of_week': timestamps.dt.dayofweek.to_numpy(),
+            'day_of_month': timestamps.dt.day.to_numpy(),
+            'month': timestamps.dt.month.to_numpy(),
+            'quarter': timestamps.dt.quarter.to_numpy(),
+        }
+
+    dates = timestamps.to_numpy(dtype='datetime64[ns]')
+    ns = dates.view(np.int64)
+    months = dates.astype('datetime64[M]')
+    month = (months.view(np.int64) % 12 + 1).astype(np.int32)
+    return {
+        'hour': (ns // NS_PER_HOUR % 24).astype(np.int32),
+        # 1970-01-01 was a Thursday
+        'day_of_week': ((ns // NS_PER_DAY + 3) % 7).astype(np.int32),
+        'day_of_month': ((dates.astype('datetime64[D]') - months).astype(np.int32) + 1),
+        'month': month,
+        'quarter': (month - 1) // 3 + 1,
+    }
+
+
+def _group_means(keys: np.ndarray, values: np.ndarray, n_groups: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Mean of `values` per small non-negative integer key using bincount
+    instead of a hashed groupby.
+    
+    Args:
+        keys: Integer key per row (NaN keys, e.g. from NaT, are dropped)
+        values: Value per row; NaNs are skipped
+        n_groups: Number of possible keys
+        
+    Returns:
+        Tuple of (present keys in ascending order, their means). A key whose
+        values are all NaN has a NaN mean, like groupby().mean()
+    """
+    keys = np.asarray(keys)
+    values = np.asarray(values, dtype=np.float64)
+    if keys.dtype.kind == 'f':
+        has_key = ~np.isnan(keys)
+        keys, values = keys[has_key], values[has_key]
+    keys = keys.astype(np.intp)
+    observed = ~np.isnan(values)
+
+    rows = np.bincount(keys, minlength=n_groups)
+    counts = np.bincount(keys[observed], minlength=n_groups)
+    sums = np.bincount(keys[observed], weights=values[observed], minlength=n_groups)
+    present = np.flatnonzero(rows)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return present, sums[present] / counts[present]
+
+
+def _cyclical_encodings(hour: np.ndarray, day_of_week: np.ndarray, month: np.ndarray) -> np.ndarray:
+    """
+    Sine/cosine pairs of the hour, day of week and month.
+    
+    Args:
+        hour: Hour of day per row
+        day_of_week: Day of week per row (Monday=0)
+        month: Month per row (1-12)
+        
+    Returns:
+        float32 array of shape (n, 6) ordered like CYCLICAL_FEATURES
+    """
+    cyc = np.empty((len(hour), 6), dtype=np.float32)
+    cycles = ((hour, TWO_PI_OVER_24), (day_of_week, TWO_PI_OVER_7), (month, TWO_PI_OVER_12))
+    for k, (values, step) in enumerate(cycles):
+        theta = np.asarray(values, dtype=np.float32) * np.float32(step)
+        np.sin(theta, out=cyc[:, 2 * k])
+        np.cos(theta, out=cyc[:, 2 * k + 1])
+    return cyc
+
+
+def _backfill_column(column: np.ndarray) -> np.ndarray:
+    """
+    Replace each NaN with the next valid value, or zero if there is none,
+    like Series.fillna(method='bfill').fillna(0).
+    
+    Args:
+        column: 1-D float array
+        
+    Returns:
+        Filled copy of the column
+    """
+    n = len(column)
+    next_valid = np.where(np.isnan(column), n, np.arange(n))
+    next_valid = np.minimum.accumulate(next_valid[::-1])[::-1]
+    return np.append(column, 0)[next_valid]
+
+
+def _backfill(values: np.ndarray) -> np.ndarray:
+    """
+    Backfill the columns of a 2-D float array in place, touching only the
+    columns that contain NaNs.
+    
+    Args:
+        values: 2-D float array
+        
+    Returns:
+        The filled array
+    """
+    for j in np.flatnonzero(np.isnan(values).any(axis=0)):
+        values[:, j] = _backfill_column(values[:, j])
+    return values
+
 
 class EnergyForecastingModel:
     """
@@ -19,35 +368,73 @@ class EnergyForecastingModel:
     Predicts future energy usage based on historical patterns and external factors.
     """
 
-    def __init__(self, model_type: str = 'random_forest'):
+    def __init__(self, model_type: str = 'random_forest', prediction_backend: str = 'sklearn'):
         """
         Initialize the energy forecasting model.
         
         Args:
-            model_type: Type of model ('random_forest' or 'gradient_boosting')
+            model_type: Type of model ('random_forest', 'gradient_boosting' or
+                'lightgbm')
+            prediction_backend: 'sklearn', or 'treelite' to compile a trained
+                random forest to native code for low-latency predictions
         """
         if model_type == 'random_forest':
+            # Half the features per split and half the rows per tree keep the
+            # trees smaller and training faster for a small accuracy cost
             self.model = RandomForestRegressor(
                 n_estimators=100,
                 max_depth=15,
                 min_samples_split=5,
+                max_features=0.5,
+                max_samples=0.5,
+                bootstrap=True,
+                oob_score=True,
                 random_state=42,
                 n_jobs=-1
             )
         elif model_type == 'gradient_boosting':
-            self.model = GradientBoostingRegressor(
-                n_estimators=100,
+            # Histogram-based boosting: features are binned to uint8 and
+            # split search is parallel across features
+            self.model = HistGradientBoostingRegressor(
+                max_iter=100,
                 max_depth=5,
                 learning_rate=0.1,
+                early_stopping=True,
                 random_state=42
             )
+        elif model_type == 'lightgbm':
+            if not LIGHTGBM_AVAILABLE:
+                raise ImportError("lightgbm is required for model_type='lightgbm'")
+            # Leaf-wise histogram boosting with row and column subsampling;
+            # bagging only takes effect with a non-zero subsample_freq
+            self.model = lgb.LGBMRegressor(
+                n_estimators=300,
+                num_leaves=63,
+                learning_rate=0.05,
+                subsample=0.8,
+                subsample_freq=1,
+                colsample_bytree=0.8,
+                importance_type='gain',
+                random_state=42,
+                n_jobs=-1,
+                verbose=-1
+            )
         else:
             raise ValueError(f"Unknown model type: {model_type}")
 
-        self.scaler = StandardScaler()
+        if prediction_backend not in ('sklearn', 'treelite'):
+            raise ValueError(f"Unknown prediction backend: {prediction_backend}")
+
+        # Tree splits are invariant to per-feature scaling, so tree models
+        # are fit on the raw features
+        self.scaler = None if model_type in TREE_MODEL_TYPES else StandardScaler()
         self.feature_names = []
         self.is_trained = False
         self.model_type = model_type
+        self.prediction_backend = prediction_backend
+        self._predictor = None
+        self._predictor_lib = None
+        self._predictor_dir = None
 
     def engineer_features(self, data: pd.DataFrame) -> pd.DataFrame:
         """
@@ -59,62 +446,101 @@ class EnergyForecastingModel:
         Returns:
             DataFrame with engineered features
         """
-        features = pd.DataFrame()
+        columns = self._feature_columns(data)
+
+        # Fill NaN values; only float columns can hold them
+        for name, values in columns.items():
+            values = np.asarray(values)
+            if values.dtype.kind == 'f' and np.isnan(values).any():
+                columns[name] = _backfill_column(values)
+        features = pd.DataFrame(columns, index=data.index)
+
+        self.feature_names = features.columns.tolist()
+        return features
+
+    def _engineer_features_array(self, data: pd.DataFrame) -> np.ndarray:
+        """
+        Engineer the trained features straight into a float32 matrix, without
+        building a DataFrame.
+        
+        Args:
+            data: Raw energy consumption data
+            
+        Returns:
+            float32 array of shape (n, n_features) ordered like feature_names
+        """
+        columns = self._feature_columns(data)
+        features = np.empty((len(data), len(self.feature_names)), dtype=np.float32)
+        for j, name in enumerate(self.feature_names):
+            features[:, j] = columns[name]
+        return _backfill(features)
+
+    def _feature_columns(self, data: pd.DataFrame) -> Dict[str, np.ndarray]:
+        """
+        Compute the raw (unfilled) feature columns.
+        
+        Args:
+            data: Raw energy consumption data
+            
+        Returns:
+            Dictionary mapping feature names to column values, in feature order
+        """
+        features = {}
 
         # Ensure timestamp is datetime
         if 'timestamp' in data.columns:
             data['timestamp'] = pd.to_datetime(data['timestamp'])
             
             # Time-based features
-            features['hour'] = data['timestamp'].dt.hour
-            features['day_of_week'] = data['timestamp'].dt.dayofweek
-            features['day_of_month'] = data['timestamp'].dt.day
-            features['month'] = data['timestamp'].dt.month
-            features['quarter'] = data['timestamp'].dt.quarter
-            features['is_weekend'] = (data['timestamp'].dt.dayofweek >= 5).astype(int)
+            features.update(_calendar_fields(data['timestamp']))
+            features['is_weekend'] = (features['day_of_week'] >= 5).astype(int)
             features['is_business_hours'] = (
-                (data['timestamp'].dt.hour >= 9) & 
-                (data['timestamp'].dt.hour <= 17)
+                (features['hour'] >= 9) & 
+                (features['hour'] <= 17)
             ).astype(int)
 
             # Cyclical encoding for time features
-            features['hour_sin'] = np.sin(2 * np.pi * features['hour'] / 24)
-            features['hour_cos'] = np.cos(2 * np.pi * features['hour'] / 24)
-            features['day_sin'] = np.sin(2 * np.pi * features['day_of_week'] / 7)
-            features['day_cos'] = np.cos(2 * np.pi * features['day_of_week'] / 7)
-            features['month_sin'] = np.sin(2 * np.pi * features['month'] / 12)
-            features['month_cos'] = np.cos(2 * np.pi * features['month'] / 12)
+            cyc = _cyclical_encodings(features['hour'], features['day_of_week'], features['month'])
+            for k, name in enumerate(CYCLICAL_FEATURES):
+                features[name] = cyc[:, k]
 
         # Historical energy features
         if 'energy' in data.columns:
-            # Lag features
-            for lag in [1, 2, 3, 6, 12, 24]:
-                features[f'energy_lag_{lag}'] = data['energy'].shift(lag)
+            energy = data['energy'].to_numpy(dtype=np.float64)
+
+            # Lag features, one slice copy per lag into a single block
+            lags = np.full((len(energy), len(LAG_HOURS)), np.nan)
+            for k, lag in enumerate(LAG_HOURS):
+                lags[lag:, k] = energy[:-lag]
+            for k, lag in enumerate(LAG_HOURS):
+                features[f'energy_lag_{lag}'] = lags[:, k]
 
             # Rolling statistics
-            for window in [3, 6, 12, 24]:
-                features[f'energy_rolling_mean_{window}'] = (
-                    data['energy'].rolling(window=window, min_periods=1).mean()
-                )
-                features[f'energy_rolling_std_{window}'] = (
-                    data['energy'].rolling(window=window, min_periods=1).std()
-                )
-                features[f'energy_rolling_max_{window}'] = (
-                    data['energy'].rolling(window=window, min_periods=1).max()
-                )
-                features[f'energy_rolling_min_{window}'] = (
-                    data['energy'].rolling(window=window, min_periods=1).min()
-                )
+            if NUMBA_AVAILABLE:
+                rolling = _rolling_all(energy, np.array(ROLLING_WINDOWS, dtype=np.int64))
+                for k, window in enumerate(ROLLING_WINDOWS):
+                    features[f'energy_rolling_mean_{window}'] = rolling[:, 4 * k]
+                    features[f'energy_rolling_std_{window}'] = rolling[:, 4 * k + 1]
+                    features[f'energy_rolling_max_{window}'] = rolling[:, 4 * k + 2]
+                    features[f'energy_rolling_min_{window}'] = rolling[:, 4 * k + 3]
+            else:
+                for window in ROLLING_WINDOWS:
+                    energy_window = data['energy'].rolling(window=window, min_periods=1)
+                    features[f'energy_rolling_mean_{window}'] = energy_window.mean()
+                    features[f'energy_rolling_std_{window}'] = energy_window.std()
+                    features[f'energy_rolling_max_{window}'] = energy_window.max()
+                    features[f'energy_rolling_min_{window}'] = energy_window.min()
 
             # Exponential moving average
-            features['energy_ema_12'] = data['energy'].ewm(span=12, adjust=False).mean()
-            features['energy_ema_24'] = data['energy'].ewm(span=24, adjust=False).mean()
+            emas = _energy_emas(energy)
+            for k, span in enumerate(EMA_SPANS):
+                features[f'energy_ema_{span}'] = emas[:, k]
 
         # Power features
         if 'power' in data.columns:
             features['power'] = data['power']
             features['power_rolling_mean_6'] = (
-                data['power'].rolling(window=6, min_periods=1).mean()
+                data['power'].rolling(window=EXOG_WINDOW, min_periods=1).mean()
             )
 
         # Weather features
@@ -122,7 +548,7 @@ class EnergyForecastingModel:
             features['temperature'] = data['temperature']
             features['temp_squared'] = data['temperature'] ** 2
             features['temp_rolling_mean'] = (
-                data['temperature'].rolling(window=6, min_periods=1).mean()
+                data['temperature'].rolling(window=EXOG_WINDOW, min_periods=1).mean()
             )
 
         if 'humidity' in data.columns:
@@ -136,10 +562,6 @@ class EnergyForecastingModel:
         if 'occupancy' in data.columns:
             features['occupancy'] = data['occupancy']
 
-        # Fill NaN values
-        features = features.fillna(method='bfill').fillna(0)
-
-        self.feature_names = features.columns.tolist()
         return features
 
     def train(
@@ -179,13 +601,20 @@ class EnergyForecastingModel:
             features, target, test_size=test_size, random_state=42, shuffle=False
         )
 
-        # Scale features
-        X_train_scaled = self.scaler.fit_transform(X_train)
-        X_test_scaled = self.scaler.transform(X_test)
+        # Scale features. The frame mixes integer, bool and float columns, so
+        # convert to one float dtype rather than an object array; the tree
+        # models work in float32, the same as the prediction path
+        dtype = np.float32 if self.scaler is None else np.float64
+        X_train_scaled = X_train.to_numpy(dtype=dtype)
+        X_test_scaled = X_test.to_numpy(dtype=dtype)
+        if self.scaler is not None:
+            X_train_scaled = self.scaler.fit_transform(X_train_scaled)
+            X_test_scaled = self.scaler.transform(X_test_scaled)
 
         # Train model
         self.model.fit(X_train_scaled, y_train)
         self.is_trained = True
+        self._predictor = self._compile_predictor()
 
         # Evaluate
         train_pred = self.model.predict(X_train_scaled)
@@ -201,12 +630,17 @@ class EnergyForecastingModel:
             'feature_count': len(features.columns)
         }
 
-        # Cross-validation
-        cv_scores = cross_val_score(
-            self.model, X_train_scaled, y_train, cv=5, scoring='neg_mean_absolute_error'
-        )
-        metrics['cv_mae_mean'] = float(-cv_scores.mean())
-        metrics['cv_mae_std'] = float(cv_scores.std())
+        # Cross-validation. The forest's out-of-bag predictions already give
+        # a held-out estimate without refitting
+        if self.model_type == 'random_forest':
+            metrics['cv_mae_mean'] = float(mean_absolute_error(y_train, self.model.oob_prediction_))
+        else:
+            cv_scores = cross_val_score(
+                self.model, X_train_scaled, y_train, cv=TimeSeriesSplit(n_splits=5),
+                scoring='neg_mean_absolute_error', n_jobs=-1
+            )
+            metrics['cv_mae_mean'] = float(-cv_scores.mean())
+            metrics['cv_mae_std'] = float(cv_scores.std())
 
         logger.info(f"Training completed. Test MAE: {metrics['test_mae']:.2f}, R²: {metrics['test_r2']:.3f}")
         return metrics
@@ -224,17 +658,78 @@ class EnergyForecastingModel:
         if not self.is_trained:
             raise ValueError("Model must be trained before making predictions")
 
-        features = self.engineer_features(data)
-        scaled_features = self.scaler.transform(features)
-        predictions = self.model.predict(scaled_features)
+        features = self._engineer_features_array(data)
+        predictions = self._predict_features(features)
 
         return predictions
 
+    def _compile_predictor(self, libpath: Optional[str] = None):
+        """
+        Compile the trained random forest to a native shared library when the
+        treelite backend is requested. Any previously compiled library of
+        this instance is released first.
+        
+        Args:
+            libpath: Library compiled from this forest earlier (saved next to
+                the model file); loaded instead of compiling when it exists
+            
+        Returns:
+            tl2cgen Predictor, or None to predict with scikit-learn
+        """
+        self._release_predictor()
+        if self.prediction_backend != 'treelite' or not isinstance(self.model, RandomForestRegressor):
+            return None
+        if not TREELITE_AVAILABLE:
+            logger.warning("treelite/tl2cgen not installed; predicting with scikit-learn")
+            return None
+
+        if libpath is not None and os.path.exists(libpath):
+            try:
+                predictor = tl2cgen.Predictor(libpath, nthread=1)
+                self._predictor_lib = libpath
+                return predictor
+            except Exception as e:
+                logger.warning(f"Could not load compiled forest {libpath} ({e}); compiling again")
+
+        # The library lives in a temporary directory owned by this instance,
+        # deleted when the forest is compiled again or the model is collected
+        self._predictor_dir = tempfile.TemporaryDirectory(prefix='energy_forecast_')
+        libpath = os.path.join(self._predictor_dir.name, 'model.so')
+        tl2cgen.export_lib(
+            treelite.sklearn.import_model(self.model),
+            toolchain='gcc',
+            libpath=libpath,
+            params={'parallel_comp': os.cpu_count() or 1}
+        )
+        self._predictor_lib = libpath
+        return tl2cgen.Predictor(libpath, nthread=1)
+
+    def _release_predictor(self) -> None:
+        """Drop the compiled forest and delete its temporary library, if any."""
+        self._predictor = None
+        self._predictor_lib = None
+        if self._predictor_dir is not None:
+            self._predictor_dir.cleanup()
+            self._predictor_dir = None
+
+    def _predict_features(self, features: np.ndarray) -> np.ndarray:
+        """
+        Predict from an engineered feature matrix, scaling it first if the
+        model uses a scaler, with the compiled forest if available and
+        otherwise with the scikit-learn model.
+        """
+        scaled_features = features if self.scaler is None else self.scaler.transform(features)
+        if self._predictor is None:
+            return self.model.predict(scaled_features)
+        dmat = tl2cgen.DMatrix(np.asarray(scaled_features, dtype=np.float32))
+        return self._predictor.predict(dmat).reshape(-1)
+
     def forecast_future(
         self,
         historical_data: pd.DataFrame,
         hours_ahead: int = 24,
-        external_features: Optional[pd.DataFrame] = None
+        external_features: Optional[pd.DataFrame] = None,
+        strategy: str = 'recursive'
     ) -> pd.DataFrame:
         """
         Forecast energy consumption for future time periods.
@@ -243,12 +738,17 @@ class EnergyForecastingModel:
             historical_data: Historical energy data
             hours_ahead: Number of hours to forecast
             external_features: Optional external features (weather, etc.)
+            strategy: 'recursive' feeds each prediction back into the next
+                hour's energy features; 'direct' holds unobserved hours at the
+                last observed energy and predicts all hours in one batch
             
         Returns:
             DataFrame with forecasted values
         """
         if not self.is_trained:
             raise ValueError("Model must be trained before forecasting")
+        if strategy not in ('recursive', 'direct'):
+            raise ValueError(f"Unknown forecast strategy: {strategy}")
 
         # Get the last timestamp
         last_timestamp = pd.to_datetime(historical_data['timestamp'].max())
@@ -260,38 +760,43 @@ class EnergyForecastingModel:
             freq='H'
         )
 
-        # Create future data structure
-        future_data = pd.DataFrame({'timestamp': future_timestamps})
+        # Energy buffer: the history tail followed by one slot per forecast hour.
+        # Each step fills its slot with the previous value as a placeholder for
+        # the unknown current hour; the recursive strategy then overwrites it
+        # with the prediction
+        energy_history = historical_data['energy'].to_numpy(dtype=np.float64)
+        tail = energy_history[-(ENERGY_TAIL - 1):]
+        energy_buffer = np.empty(len(tail) + hours_ahead)
+        energy_buffer[:len(tail)] = tail
+        ema_states = _energy_emas(energy_history)[-1]
+        exog_buffers = self._future_exogenous(historical_data, future_timestamps, external_features)
+
+        # Columns that do not depend on predicted energy are filled for the
+        # whole horizon up front; the loop only rewrites the energy columns
+        feature_rows = np.empty((hours_ahead, len(self.feature_names)), dtype=np.float32)
+        self._fill_exogenous_columns(feature_rows, future_timestamps, exog_buffers)
+        energy_names = [name for name in self.feature_names if name.startswith('energy_')]
+        energy_idx = np.array([self.feature_names.index(name) for name in energy_names], dtype=np.intp)
 
-        # Add external features if provided
-        if external_features is not None:
-            future_data = future_data.merge(
-                external_features,
-                on='timestamp',
-                how='left'
+        # Make predictions iteratively
+        predictions = np.empty(hours_ahead)
+        for i in range(hours_ahead):
+            current = len(tail) + i
+            energy_buffer[current] = energy_buffer[current - 1]
+            energy_values = self._energy_features_for_step(
+                energy_buffer[max(0, current - ENERGY_TAIL + 1):current + 1],
+                ema_states
             )
+            feature_rows[i, energy_idx] = [energy_values[name] for name in energy_names]
 
-        # For features that depend on historical data, we'll use the last known values
-        # This is a simplified approach; in production, you'd want more sophisticated methods
-        last_energy = historical_data['energy'].iloc[-1]
-        future_data['energy'] = last_energy
-
-        if 'power' in historical_data.columns:
-            future_data['power'] = historical_data['power'].iloc[-1]
+            if strategy == 'recursive':
+                # Feed the prediction back as this hour's energy
+                predictions[i] = self._predict_features(feature_rows[i:i + 1])[0]
+                energy_buffer[current] = predictions[i]
+            ema_states = _ewm_step(ema_states, energy_buffer[current], EMA_ALPHAS)
 
-        # Make predictions iteratively
-        predictions = []
-        for i in range(hours_ahead):
-            # Prepare features for this time step
-            current_data = pd.concat([historical_data, future_data.iloc[:i+1]])
-            
-            # Predict
-            pred = self.predict(current_data.iloc[[-1]])
-            predictions.append(pred[0])
-            
-            # Update future_data with prediction for next iteration
-            if i < hours_ahead - 1:
-                future_data.loc[i, 'energy'] = pred[0]
+        if strategy == 'direct':
+            predictions = self._predict_features(feature_rows)
 
         # Create forecast DataFrame
         forecast = pd.DataFrame({
@@ -305,6 +810,125 @@ class EnergyForecastingModel:
 
         return forecast
 
+    def _future_exogenous(
+        self,
+        historical_data: pd.DataFrame,
+        future_timestamps: pd.DatetimeIndex,
+        external_features: Optional[pd.DataFrame]
+    ) -> Dict[str, np.ndarray]:
+        """
+        Exogenous values for the forecast horizon, prefixed with the history
+        needed by their rolling means.
+        
+        Args:
+            historical_data: Historical energy data
+            future_timestamps: Timestamps being forecast
+            external_features: Optional external features keyed by timestamp
+            
+        Returns:
+            Dictionary mapping each exogenous feature column to an array of
+            EXOG_WINDOW - 1 historical values followed by one value per hour
+        """
+        external = None
+        if external_features is not None:
+            external = external_features.assign(
+                timestamp=pd.to_datetime(external_features['timestamp'])
+            ).set_index('timestamp').reindex(future_timestamps)
+
+        buffers = {}
+        for column in EXOG_COLUMNS:
+            if column not in self.feature_names:
+                continue
+            if column in historical_data.columns:
+                history = historical_data[column].to_numpy(dtype=np.float64)[-(EXOG_WINDOW - 1):]
+            else:
+                history = np.zeros(0)
+            last_known = history[-1] if len(history) else 0.0
+            future = np.full(len(future_timestamps), last_known)
+            if external is not None and column in external.columns:
+                given = external[column].to_numpy(dtype=np.float64)
+                future = np.where(np.isnan(given), future, given)
+            buffers[column] = np.concatenate([np.full(EXOG_WINDOW - 1 - len(history), last_known), history, future])
+        return buffers
+
+    def _fill_exogenous_columns(
+        self,
+        out: np.ndarray,
+        future_timestamps: pd.DatetimeIndex,
+        exog_buffers: Dict[str, np.ndarray]
+    ) -> None:
+        """
+        Fill the calendar and exogenous feature columns of every forecast hour
+        in one vectorized pass.
+        
+        Args:
+            out: Feature matrix of shape (hours_ahead, n_features) ordered like
+                feature_names; energy columns are left untouched
+            future_timestamps: Timestamps being forecast
+            exog_buffers: Output of _future_exogenous
+        """
+        values = _calendar_fields(future_timestamps.to_series())
+        hour = values['hour']
+        day_of_week = values['day_of_week']
+        values['is_weekend'] = day_of_week >= 5
+        values['is_business_hours'] = (hour >= 9) & (hour <= 17)
+        cyc = _cyclical_encodings(hour, day_of_week, values['month'])
+        for k, name in enumerate(CYCLICAL_FEATURES):
+            values[name] = cyc[:, k]
+
+        for column, buffer in exog_buffers.items():
+            values[column] = buffer[EXOG_WINDOW - 1:]
+        windows = {
+            column: np.lib.stride_tricks.sliding_window_view(buffer, EXOG_WINDOW)
+            for column, buffer in exog_buffers.items()
+        }
+        if 'power' in windows:
+            values['power_rolling_mean_6'] = windows['power'].mean(axis=1)
+        if 'temperature' in windows:
+            values['temp_squared'] = values['temperature'] ** 2
+            values['temp_rolling_mean'] = windows['temperature'].mean(axis=1)
+
+        for j, name in enumerate(self.feature_names):
+            if name in values:
+                out[:, j] = values[name]
+
+    def _energy_features_for_step(
+        self,
+        energy_tail: np.ndarray,
+        ema_states: np.ndarray
+    ) -> Dict[str, float]:
+        """
+        Energy lag, rolling and EMA features of a single forecast hour,
+        computed from a short tail instead of the whole history.
+        
+        Args:
+            energy_tail: Up to ENERGY_TAIL recent energy values, ending with the
+                current hour's value
+            ema_states: Energy EMA of each span up to the previous hour
+            
+        Returns:
+            Dictionary mapping energy feature names to values
+        """
+        current = energy_tail[-1]
+        values = {}
+
+        # Lags reaching past the available history are zero, as the final
+        # fill in engineer_features leaves them
+        for lag in LAG_HOURS:
+            values[f'energy_lag_{lag}'] = energy_tail[-1 - lag] if lag < len(energy_tail) else 0.0
+
+        for window in ROLLING_WINDOWS:
+            recent = energy_tail[-window:]
+            values[f'energy_rolling_mean_{window}'] = recent.mean()
+            values[f'energy_rolling_std_{window}'] = recent.std(ddof=1) if len(recent) > 1 else 0.0
+            values[f'energy_rolling_max_{window}'] = recent.max()
+            values[f'energy_rolling_min_{window}'] = recent.min()
+
+        for span, ema in zip(EMA_SPANS, _ewm_step(ema_states, current, EMA_ALPHAS)):
+            values[f'energy_ema_{span}'] = ema
+
+        return values
+
     def get_feature_importance(self) -> Dict[str, float]:
         """
         Get feature importance scores.
@@ -344,18 +968,34 @@ class EnergyForecastingModel:
             Dictionary with pattern analysis
         """
         data['timestamp'] = pd.to_datetime(data['timestamp'])
-        data['hour'] = data['timestamp'].dt.hour
-        data['day_of_week'] = data['timestamp'].dt.dayofweek
+        calendar = _calendar_fields(data['timestamp'])
+        data['hour'] = calendar['hour']
+        data['day_of_week'] = calendar['day_of_week']
+
+        energy = data['energy'].to_numpy(dtype=np.float64)
+        hours, hourly_means = _group_means(calendar['hour'], energy, 24)
+        days, daily_means = _group_means(calendar['day_of_week'], energy, 7)
+
+        # Partial sorts pick the three highest and lowest hours; only those
+        # three are then ordered
+        ranked_hours = hours[~np.isnan(hourly_means)]
+        ranked_means = hourly_means[~np.isnan(hourly_means)]
+        peak = off_peak = np.arange(len(ranked_means))
+        if len(ranked_means) > 3:
+            peak = np.argpartition(-ranked_means, 2)[:3]
+            off_peak = np.argpartition(ranked_means, 2)[:3]
+        peak = peak[np.argsort(-ranked_means[peak], kind='stable')]
+        off_peak = off_peak[np.argsort(ranked_means[off_peak], kind='stable')]
 
         analysis = {
             'total_consumption': float(data['energy'].sum()),
             'average_consumption': float(data['energy'].mean()),
             'peak_consumption': float(data['energy'].max()),
             'min_consumption': float(data['energy'].min()),
-            'hourly_pattern': data.groupby('hour')['energy'].mean().to_dict(),
-            'daily_pattern': data.groupby('day_of_week')['energy'].mean().to_dict(),
-            'peak_hours': data.groupby('hour')['energy'].mean().nlargest(3).index.tolist(),
-            'off_peak_hours': data.groupby('hour')['energy'].mean().nsmallest(3).index.tolist()
+            'hourly_pattern': dict(zip(hours.tolist(), hourly_means.tolist())),
+            'daily_pattern': dict(zip(days.tolist(), daily_means.tolist())),
+            'peak_hours': ranked_hours[peak].tolist(),
+            'off_peak_hours': ranked_hours[off_peak].tolist()
         }
 
         return analysis
@@ -375,10 +1015,21 @@ class EnergyForecastingModel:
             'scaler': self.scaler,
             'feature_names': self.feature_names,
             'is_trained': self.is_trained,
-            'model_type': self.model_type
+            'model_type': self.model_type,
+            'prediction_backend': self.prediction_backend
         }
 
-        joblib.dump(model_data, filepath)
+        joblib.dump(model_data, filepath, compress=MODEL_COMPRESSION, protocol=5)
+
+        # Keep the compiled forest next to the model so loading it does not
+        # need another compiler run; a library left from an earlier model
+        # saved under this name is removed
+        libpath = _predictor_libpath(filepath)
+        if self._predictor_lib is not None:
+            if not os.path.exists(libpath) or not os.path.samefile(self._predictor_lib, libpath):
+                shutil.copyfile(self._predictor_lib, libpath)
+        elif os.path.exists(libpath):
+            os.remove(libpath)
         logger.info(f"Model saved to {filepath}")
 
     def load_model(self, filepath: str) -> None:
@@ -391,10 +1042,12 @@ class EnergyForecastingModel:
         model_data = joblib.load(filepath)
 
         self.model = model_data['model']
-        self.scaler = model_data['scaler']
+        self.scaler = model_data.get('scaler')
         self.feature_names = model_data['feature_names']
         self.is_trained = model_data['is_trained']
         self.model_type = model_data['model_type']
+        self.prediction_backend = model_data.get('prediction_backend', 'sklearn')
+        self._predictor = self._compile_predictor(_predictor_libpath(filepath))
 
         logger.info(f"Model loaded from {filepath}")
 
@@ -436,8 +1089,8 @@ def generate_sample_energy_data(n_samples: int = 2000) -> pd.DataFrame:
         'power': energy * 1.2 + np.random.normal(0, 2, n_samples),
         'temperature': 20 + 5 * np.sin(2 * np.pi * hours / 24) + np.random.normal(0, 1, n_samples),
         'humidity': 50 + 10 * np.sin(2 * np.pi * hours / 24) + np.random.normal(0, 3, n_samples),
-        'active_devices': np.random.randint(5, 15, n_samples),
-        'occupancy': (hours >= 18) | (hours <= 8) | (days >= 5)
+        'active_devices': np.random.randint(5, 15, n_samples, dtype=np.int8),
+        'occupancy': np.asarray((hours >= 18) | (hours <= 8) | (days >= 5), dtype=np.bool_)
     })
 
     return data
@@ -11,9 +11,96 @@ from typing import Dict, List, Tuple, Optional
 import warnings
 warnings.filterwarnings('ignore')
 
+# Shared with the other models; the plain import covers loading this file
+# from the models directory or running it as a script
+try:
+    from models._rolling import ROLLING_WINDOW_STATS, rolling_window_stats
+except ImportError:
+    from _rolling import ROLLING_WINDOW_STATS, rolling_window_stats
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Samples in the rolling window of the short-term telemetry statistics
+TELEMETRY_WINDOW = 24
+
+# Samples in the baseline window that response degradation is measured
+# against (one week of hourly telemetry)
+RESPONSE_BASELINE_WINDOW = 168
+
+# Samples in the rolling window of the daily usage statistics
+USAGE_WINDOW = 7
+
+# Saved-model compression; the forests' node arrays dominate the file and
+# lz4 shrinks them several times at little cost to load time
+MODEL_COMPRESSION = ('lz4', 3)
+
+# Telemetry columns whose rolling mean, std and max are taken together
+TELEMETRY_COLUMNS = ('power_consumption', 'temperature', 'error_count',
+                     'response_time', 'vibration_level')
+
+
+def _rolling_stats(values: pd.DataFrame, window: int) -> Dict[str, pd.DataFrame]:
+    """
+    Trailing-window statistics of several telemetry columns.
+    
+    Args:
+        values: Numeric columns to aggregate
+        window: Window length in samples (min_periods=1)
+        
+    Returns:
+        Dictionary with 'mean', 'std' and 'max' frames shaped like `values`;
+        the std is NaN for windows with fewer than two observations
+    """
+    stats = rolling_window_stats(values.to_numpy(dtype=np.float64), window)
+    return {
+        name: pd.DataFrame(plane.T, index=values.index, columns=values.columns)
+        for name, plane in zip(ROLLING_WINDOW_STATS, stats) if name != 'sum'
+    }
+
+
+def _window_counts(flags: np.ndarray, window: int) -> np.ndarray:
+    """Number of set flags in each trailing window, from one cumulative sum."""
+    cumulative = np.concatenate([[0], np.cumsum(flags, dtype=np.int64)])
+    counts = cumulative[1:].copy()
+    counts[window:] -= cumulative[1:-window]
+    return counts.astype(np.float64)
+
+
+def _full_window_mean(values: pd.Series, window: int,
+                      rolling_mean: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Trailing mean over complete windows, like rolling(window).mean().
+    
+    Args:
+        values: Column to average
+        window: Window length in samples
+        rolling_mean: Already computed rolling(min_periods=1) mean of
+            `values`, reused instead of summing the column again
+        
+    Returns:
+        Array of window means, NaN until the window holds `window`
+        observations and while it contains a NaN
+    """
+    values = values.to_numpy(dtype=np.float64)
+    valid = ~np.isnan(values)
+    if rolling_mean is None:
+        totals = np.concatenate([[0.0], np.cumsum(np.where(valid, values, 0.0))])
+        rolling_mean = np.full(len(values), np.nan)
+        rolling_mean[window - 1:] = (totals[window:] - totals[:-window]) / window
+    else:
+        rolling_mean = np.array(rolling_mean, dtype=np.float64)
+    rolling_mean[_window_counts(valid, window) < window] = np.nan
+    return rolling_mean
+
+
+def _diff(values: pd.Series) -> np.ndarray:
+    """First difference with 0 for the first row, like diff().fillna(0)."""
+    values = values.to_numpy(dtype=np.float64)
+    out = np.zeros(len(values))
+    np.subtract(values[1:], values[:-1], out=out[1:])
+    return out
+
 
 class PredictiveMaintenanceModel:
     """
@@ -25,7 +112,8 @@ class PredictiveMaintenanceModel:
         self.anomaly_detector = IsolationForest(
             contamination=0.1,
             random_state=42,
-            n_estimators=100
+            n_estimators=100,
+            n_jobs=-1
         )
         self.rul_predictor = RandomForestRegressor(
             n_estimators=100,
@@ -47,7 +135,15 @@ class PredictiveMaintenanceModel:
         Returns:
             DataFrame with engineered features
         """
-        features = pd.DataFrame()
+        features = {}
+
+        # Rolling statistics of all telemetry columns in one sweep
+        rolling = _rolling_stats(
+            data[[c for c in TELEMETRY_COLUMNS if c in data.columns]], TELEMETRY_WINDOW
+        )
+        rolling_mean = rolling['mean']
+        rolling_std = rolling['std'].fillna(0)
+        rolling_max = rolling['max']
 
         # Operating time features
         if 'operating_hours' in data.columns:
@@ -56,55 +152,70 @@ class PredictiveMaintenanceModel:
 
         # Power consumption features
         if 'power_consumption' in data.columns:
-            features['power_avg'] = data['power_consumption'].rolling(window=24, min_periods=1).mean()
-            features['power_std'] = data['power_consumption'].rolling(window=24, min_periods=1).std().fillna(0)
-            features['power_max'] = data['power_consumption'].rolling(window=24, min_periods=1).max()
-            features['power_trend'] = data['power_consumption'].diff().fillna(0)
+            features['power_avg'] = rolling_mean['power_consumption']
+            features['power_std'] = rolling_std['power_consumption']
+            features['power_max'] = rolling_max['power_consumption']
+            features['power_trend'] = _diff(data['power_consumption'])
 
         # Temperature features
         if 'temperature' in data.columns:
-            features['temp_avg'] = data['temperature'].rolling(window=24, min_periods=1).mean()
-            features['temp_std'] = data['temperature'].rolling(window=24, min_periods=1).std().fillna(0)
-            features['temp_max'] = data['temperature'].rolling(window=24, min_periods=1).max()
-            features['temp_spike_count'] = (data['temperature'] > 80).rolling(window=24, min_periods=1).sum()
+            features['temp_avg'] = rolling_mean['temperature']
+            features['temp_std'] = rolling_std['temperature']
+            features['temp_max'] = rolling_max['temperature']
+            features['temp_spike_count'] = _window_counts(
+                data['temperature'].to_numpy() > 80, TELEMETRY_WINDOW
+            )
 
         # Cycle count features
         if 'cycle_count' in data.columns:
             features['cycle_count'] = data['cycle_count']
-            features['cycles_per_day'] = data['cycle_count'].diff().fillna(0)
+            features['cycles_per_day'] = _diff(data['cycle_count'])
 
         # Error rate features
         if 'error_count' in data.columns:
-            features['error_rate'] = data['error_count'].rolling(window=24, min_periods=1).mean()
-            features['error_trend'] = data['error_count'].diff().fillna(0)
-            features['error_spike'] = (data['error_count'] > data['error_count'].rolling(window=24).mean() * 2).astype(int)
+            features['error_rate'] = rolling_mean['error_count']
+            features['error_trend'] = _diff(data['error_count'])
+            error_baseline = _full_window_mean(
+                data['error_count'], TELEMETRY_WINDOW, rolling_mean['error_count'].to_numpy()
+            )
+            features['error_spike'] = (data['error_count'].to_numpy() > error_baseline * 2).astype(np.int8)
 
         # Response time features
         if 'response_time' in data.columns:
-            features['response_avg'] = data['response_time'].rolling(window=24, min_periods=1).mean()
-            features['response_std'] = data['response_time'].rolling(window=24, min_periods=1).std().fillna(0)
-            features['response_degradation'] = (data['response_time'] > 
-                                               data['response_time'].rolling(window=168).mean() * 1.5).astype(int)
+            features['response_avg'] = rolling_mean['response_time']
+            features['response_std'] = rolling_std['response_time']
+            response_baseline = _full_window_mean(data['response_time'], RESPONSE_BASELINE_WINDOW)
+            features['response_degradation'] = (data['response_time'].to_numpy() >
+                                                response_baseline * 1.5).astype(np.int8)
 
         # Vibration features (for devices with motors)
         if 'vibration_level' in data.columns:
-            features['vibration_avg'] = data['vibration_level'].rolling(window=24, min_periods=1).mean()
-            features['vibration_std'] = data['vibration_level'].rolling(window=24, min_periods=1).std().fillna(0)
-            features['vibration_peak'] = data['vibration_level'].rolling(window=24, min_periods=1).max()
+            features['vibration_avg'] = rolling_mean['vibration_level']
+            features['vibration_std'] = rolling_std['vibration_level']
+            features['vibration_peak'] = rolling_max['vibration_level']
 
         # Maintenance history features
         if 'days_since_maintenance' in data.columns:
             features['days_since_maintenance'] = data['days_since_maintenance']
-            features['maintenance_overdue'] = (data['days_since_maintenance'] > 180).astype(int)
+            features['maintenance_overdue'] = (data['days_since_maintenance'] > 180).astype(np.int8)
 
         # Usage pattern features
         if 'daily_usage_hours' in data.columns:
-            features['usage_avg'] = data['daily_usage_hours'].rolling(window=7, min_periods=1).mean()
-            features['usage_variance'] = data['daily_usage_hours'].rolling(window=7, min_periods=1).std().fillna(0)
+            usage = _rolling_stats(data[['daily_usage_hours']], USAGE_WINDOW)
+            features['usage_avg'] = usage['mean']['daily_usage_hours']
+            features['usage_variance'] = usage['std']['daily_usage_hours'].fillna(0)
+
+        features = pd.DataFrame(features, index=data.index)
 
         # Fill any remaining NaN values
         features = features.fillna(0)
 
+        # The scaler and the tree models work in float32; the 0/1 flag
+        # columns stay int8
+        features = features.astype({
+            name: np.float32 for name, dtype in features.dtypes.items() if dtype != np.int8
+        })
+
         self.feature_names = features.columns.tolist()
         return features
 
@@ -227,6 +338,25 @@ class PredictiveMaintenanceModel:
         
         return rul_predictions
 
+    def _predict_both(self, data: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Anomaly and RUL predictions from a single feature and scaling pass.
+        
+        Args:
+            data: DataFrame with device telemetry
+            
+        Returns:
+            Tuple of (anomaly predictions, non-negative RUL predictions)
+        """
+        if not self.is_trained:
+            raise ValueError("Model must be trained before making predictions")
+
+        features_scaled = self.scaler.transform(self.prepare_features(data))
+        anomalies = self.anomaly_detector.predict(features_scaled)
+        rul_predictions = np.maximum(self.rul_predictor.predict(features_scaled), 0)
+
+        return anomalies, rul_predictions
+
     def assess_device_health(self, data: pd.DataFrame) -> List[Dict]:
         """
         Comprehensive device health assessment.
@@ -237,18 +367,18 @@ class PredictiveMaintenanceModel:
         Returns:
             List of health assessment dictionaries
         """
-        anomalies = self.detect_anomalies(data)
-        rul_predictions = self.predict_rul(data)
+        anomalies, rul_predictions = self._predict_both(data)
 
-        assessments = []
-        for i, device_id in enumerate(data['device_id'].unique()):
-            device_data = data[data['device_id'] == device_id]
-            device_indices = device_data.index
+        # Row positions of every device from one grouping pass, in order of
+        # first appearance
+        device_positions = data.groupby('device_id', sort=False).indices
 
-            device_anomalies = anomalies[device_indices]
-            device_rul = rul_predictions[device_indices].mean()
+        assessments = []
+        for device_id, positions in device_positions.items():
+            device_anomalies = anomalies[positions]
+            device_rul = rul_predictions[positions].mean()
 
-            anomaly_rate = (device_anomalies == -1).sum() / len(device_anomalies)
+            anomaly_rate = np.mean(device_anomalies == -1)
 
             # Determine health status
             if device_rul < 30 or anomaly_rate > 0.3:
@@ -297,8 +427,7 @@ class PredictiveMaintenanceModel:
         Returns:
             Array of failure probabilities
         """
-        rul_predictions = self.predict_rul(data)
-        anomalies = self.detect_anomalies(data)
+        anomalies, rul_predictions = self._predict_both(data)
 
         # Calculate failure probability based on RUL and anomalies
         rul_factor = np.exp(-rul_predictions / time_horizon_days)
@@ -367,7 +496,7 @@ class PredictiveMaintenanceModel:
             'feature_names': self.feature_names
         }
 
-        joblib.dump(model_data, filepath)
+        joblib.dump(model_data, filepath, compress=MODEL_COMPRESSION, protocol=5)
         logger.info(f"Models saved to {filepath}")
 
     def load_model(self, filepath: str):
@@ -395,68 +524,70 @@ def generate_synthetic_telemetry(n_devices: int = 10,
     Returns:
         Tuple of (telemetry DataFrame, RUL labels)
     """
-    np.random.seed(42)
-    
-    all_data = []
-    all_rul = []
-
-    for device_id in range(n_devices):
-        # Random device age and health
-        device_age = np.random.uniform(0, 1000)
-        health_factor = np.random.uniform(0.5, 1.0)
-
-        timestamps = pd.date_range(
-            start='2024-01-01',
-            periods=n_samples_per_device,
-            freq='1H'
-        )
-
-        # Generate telemetry with degradation over time
-        operating_hours = device_age + np.arange(n_samples_per_device)
-        
-        # Power consumption increases with age
-        power_base = 100 * health_factor
-        power_degradation = operating_hours * 0.01 * (1 - health_factor)
-        power_consumption = power_base + power_degradation + np.random.randn(n_samples_per_device) * 10
-
-        # Temperature increases with degradation
-        temp_base = 40 + (1 - health_factor) * 20
-        temperature = temp_base + np.random.randn(n_samples_per_device) * 5
-
-        # Error rate increases with age
-        error_rate = (1 - health_factor) * 0.1
-        error_count = np.random.poisson(error_rate * 10, n_samples_per_device)
-
-        # Response time degrades
-        response_base = 100 * (2 - health_factor)
-        response_time = response_base + np.random.randn(n_samples_per_device) * 20
-
-        # Calculate RUL (remaining useful life in days)
-        max_life = 2000  # hours
-        rul_hours = max_life - operating_hours
-        rul_days = np.maximum(rul_hours / 24, 0)
-
-        device_data = pd.DataFrame({
-            'device_id': f'device_{device_id}',
-            'timestamp': timestamps,
-            'operating_hours': operating_hours,
-            'power_consumption': power_consumption,
-            'temperature': temperature,
-            'cycle_count': np.cumsum(np.random.poisson(2, n_samples_per_device)),
-            'error_count': error_count,
-            'response_time': response_time,
-            'vibration_level': 10 + (1 - health_factor) * 20 + np.random.randn(n_samples_per_device) * 3,
-            'days_since_maintenance': np.arange(n_samples_per_device) % 180,
-            'daily_usage_hours': np.random.uniform(8, 16, n_samples_per_device)
-        })
-
-        all_data.append(device_data)
-        all_rul.extend(rul_days)
-
-    combined_data = pd.concat(all_data, ignore_index=True)
-    rul_array = np.array(all_rul)
-
-    return combined_data, rul_array
+    rng = np.random.default_rng(42)
+    shape = (n_devices, n_samples_per_device)
+    steps = np.arange(n_samples_per_device)
+
+    # Random device age and health, one column per device that broadcasts
+    # over its samples
+    device_age = rng.uniform(0, 1000, (n_devices, 1))
+    health_factor = rng.uniform(0.5, 1.0, (n_devices, 1)).astype(np.float32)
+    wear = 1 - health_factor
+
+    # Generate telemetry with degradation over time. Every column is drawn
+    # for all devices at once as a (device, sample) array and flattened
+    # device-major, so the frame is built once without a concat
+    operating_hours = device_age + steps
+
+    # Power consumption increases with age
+    power_consumption = rng.standard_normal(shape, dtype=np.float32)
+    power_consumption *= 10
+    power_consumption += 100 * health_factor
+    power_consumption += (operating_hours * 0.01 * wear).astype(np.float32)
+
+    # Temperature increases with degradation
+    temperature = rng.standard_normal(shape, dtype=np.float32)
+    temperature *= 5
+    temperature += 40 + wear * 20
+
+    # Error rate increases with age
+    error_count = rng.poisson(wear * 0.1 * 10, shape).astype(np.int32)
+
+    # Response time degrades
+    response_time = rng.standard_normal(shape, dtype=np.float32)
+    response_time *= 20
+    response_time += 100 * (2 - health_factor)
+
+    vibration_level = rng.standard_normal(shape, dtype=np.float32)
+    vibration_level *= 3
+    vibration_level += 10 + wear * 20
+
+    # Calculate RUL (remaining useful life in days)
+    max_life = 2000  # hours
+    rul_hours = max_life - operating_hours
+    rul_days = np.maximum(rul_hours / 24, 0)
+
+    timestamps = pd.date_range(
+        start='2024-01-01',
+        periods=n_samples_per_device,
+        freq='1H'
+    )
+
+    combined_data = pd.DataFrame({
+        'device_id': np.repeat([f'device_{i}' for i in range(n_devices)], n_samples_per_device),
+        'timestamp': np.tile(timestamps.to_numpy(), n_devices),
+        'operating_hours': operating_hours.ravel(),
+        'power_consumption': power_consumption.ravel(),
+        'temperature': temperature.ravel(),
+        'cycle_count': np.cumsum(rng.poisson(2, shape), axis=1).ravel(),
+        'error_count': error_count.ravel(),
+        'response_time': response_time.ravel(),
+        'vibration_level': vibration_level.ravel(),
+        'days_since_maintenance': np.tile(steps % 180, n_devices),
+        'daily_usage_hours': rng.uniform(8, 16, shape).astype(np.float32).ravel()
+    })
+
+    return combined_data, rul_days.ravel()
 
 
 if __name__ == '__main__':
@@ -2,6 +2,59 @@ import numpy as np
 from typing import List, Dict, Tuple
 from collections import defaultdict
 
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+
+if NUMBA_AVAILABLE:
+    @njit(fastmath=True, nogil=True)
+    def _sgd_epoch(user_idx, item_idx, ratings, user_factors, item_factors,
+                   user_biases, item_biases, global_mean, learning_rate, regularization):
+        # One pass of SGD over all interactions, updating the factors and
+        # biases in place; returns the summed squared error
+        num_factors = user_factors.shape[1]
+        total_error = 0.0
+        for n in range(ratings.shape[0]):
+            u = user_idx[n]
+            i = item_idx[n]
+
+            dot = 0.0
+            for k in range(num_factors):
+                dot += user_factors[u, k] * item_factors[i, k]
+            error = ratings[n] - (global_mean + user_biases[u] + item_biases[i] + dot)
+            total_error += error * error
+
+            # The item step sees the already-updated user factors
+            for k in range(num_factors):
+                user_factors[u, k] += learning_rate * (error * item_factors[i, k] - regularization * user_factors[u, k])
+            for k in range(num_factors):
+                item_factors[i, k] += learning_rate * (error * user_factors[u, k] - regularization * item_factors[i, k])
+
+            user_biases[u] += learning_rate * (error - regularization * user_biases[u])
+            item_biases[i] += learning_rate * (error - regularization * item_biases[i])
+        return total_error
+else:
+    def _sgd_epoch(user_idx, item_idx, ratings, user_factors, item_factors,
+                   user_biases, item_biases, global_mean, learning_rate, regularization):
+        total_error = 0.0
+        for u, i, rating in zip(user_idx, item_idx, ratings):
+            user_factor = user_factors[u]
+            item_factor = item_factors[i]
+
+            error = rating - (global_mean + user_biases[u] + item_biases[i] + np.dot(user_factor, item_factor))
+            total_error += error ** 2
+
+            user_factor += learning_rate * (error * item_factor - regularization * user_factor)
+            item_factor += learning_rate * (error * user_factor - regularization * item_factor)
+
+            user_biases[u] += learning_rate * (error - regularization * user_biases[u])
+            item_biases[i] += learning_rate * (error - regularization * item_biases[i])
+        return total_error
+
+
 class RecommendationEngine:
     def __init__(self, num_factors: int = 20):
         self.num_factors = num_factors
@@ -12,6 +65,8 @@ class RecommendationEngine:
         self.global_mean = 0.0
         self.user_to_idx = {}
         self.item_to_idx = {}
+        self.idx_to_item = []
+        self._item_factors_norm = None
         
     def fit(self, interactions: List[Tuple[str, str, float]], epochs: int = 20, learning_rate: float = 0.01, regularization: float = 0.02):
         users = set()
@@ -25,6 +80,7 @@ class RecommendationEngine:
         
         self.user_to_idx = {user: idx for idx, user in enumerate(users)}
         self.item_to_idx = {item: idx for idx, item in enumerate(items)}
+        self.idx_to_item = list(self.item_to_idx)
         
         num_users = len(users)
         num_items = len(items)
@@ -36,28 +92,24 @@ class RecommendationEngine:
         self.user_biases = np.zeros(num_users)
         self.item_biases = np.zeros(num_items)
         
+        # Map the interactions to index arrays once for all epochs
+        user_idx = np.fromiter((self.user_to_idx[user] for user, _, _ in interactions), dtype=np.int32, count=len(interactions))
+        item_idx = np.fromiter((self.item_to_idx[item] for _, item, _ in interactions), dtype=np.int32, count=len(interactions))
+        ratings = np.asarray(ratings, dtype=np.float64)
+        
         for epoch in range(epochs):
-            total_error = 0
-            
-            for user, item, rating in interactions:
-                user_idx = self.user_to_idx[user]
-                item_idx = self.item_to_idx[item]
-                
-                prediction = self.predict_rating(user, item)
-                error = rating - prediction
-                total_error += error ** 2
-                
-                user_factor = self.user_factors[user_idx]
-                item_factor = self.item_factors[item_idx]
-                
-                self.user_factors[user_idx] += learning_rate * (error * item_factor - regularization * user_factor)
-                self.item_factors[item_idx] += learning_rate * (error * user_factor - regularization * item_factor)
-                
-                self.user_biases[user_idx] += learning_rate * (error - regularization * self.user_biases[user_idx])
-                self.item_biases[item_idx] += learning_rate * (error - regularization * self.item_biases[item_idx])
+            total_error = _sgd_epoch(
+                user_idx, item_idx, ratings, self.user_factors, self.item_factors,
+                self.user_biases, self.item_biases, float(self.global_mean), learning_rate, regularization
+            )
             
             rmse = np.sqrt(total_error / len(interactions))
             print(f"Epoch {epoch + 1}/{epochs}, RMSE: {rmse:.4f}")
+        
+        # Unit-length item factors for cosine similarity; all-zero rows stay
+        # zero so their similarity is 0
+        norms = np.linalg.norm(self.item_factors, axis=1, keepdims=True)
+        self._item_factors_norm = self.item_factors / np.where(norms == 0, 1.0, norms)
     
     def predict_rating(self, user: str, item: str) -> float:
         if user not in self.user_to_idx or item not in self.item_to_idx:
@@ -73,6 +125,12 @@ class RecommendationEngine:
         
         return prediction
     
+    def predict_ratings(self, user_idx: np.ndarray, item_idx: np.ndarray) -> np.ndarray:
+        # Ratings of many (user, item) pairs given as dense indices from
+        # user_to_idx / item_to_idx, gathered in one vectorized pass
+        return (self.global_mean + self.user_biases[user_idx] + self.item_biases[item_idx]
+                + np.einsum('ij,ij->i', self.user_factors[user_idx], self.item_factors[item_idx]))
+    
     def recommend_items(self, user: str, n: int = 10, exclude_items: List[str] = None) -> List[Tuple[str, float]]:
         if user not in self.user_to_idx:
             return []
@@ -82,36 +140,37 @@ class RecommendationEngine:
         
         exclude_indices = {self.item_to_idx[item] for item in exclude_items if item in self.item_to_idx}
         
-        recommendations = []
-        idx_to_item = {idx: item for item, idx in self.item_to_idx.items()}
+        # Scores of every item for this user in one matrix-vector product
+        user_idx = self.user_to_idx[user]
+        scores = self.global_mean + self.user_biases[user_idx] + self.item_biases + self.item_factors @ self.user_factors[user_idx]
+        scores[list(exclude_indices)] = -np.inf
         
-        for item_idx in range(len(self.item_factors)):
-            if item_idx not in exclude_indices:
-                item = idx_to_item[item_idx]
-                score = self.predict_rating(user, item)
-                recommendations.append((item, score))
+        n = min(n, len(scores) - len(exclude_indices))
+        if n <= 0:
+            return []
         
-        recommendations.sort(key=lambda x: x[1], reverse=True)
-        return recommendations[:n]
+        # Partial selection of the n best, then sort only those
+        top = np.argpartition(-scores, n - 1)[:n]
+        top = top[np.argsort(-scores[top], kind='stable')]
+        return [(self.idx_to_item[idx], score) for idx, score in zip(top, scores[top])]
     
     def find_similar_items(self, item: str, n: int = 10) -> List[Tuple[str, float]]:
         if item not in self.item_to_idx:
             return []
         
         item_idx = self.item_to_idx[item]
-        item_vector = self.item_factors[item_idx]
         
-        similarities = []
-        idx_to_item = {idx: itm for itm, idx in self.item_to_idx.items()}
+        # Cosine similarity to every item as one product of unit vectors
+        similarities = self._item_factors_norm @ self._item_factors_norm[item_idx]
+        similarities[item_idx] = -np.inf
         
-        for other_idx in range(len(self.item_factors)):
-            if other_idx != item_idx:
-                other_vector = self.item_factors[other_idx]
-                similarity = self.cosine_similarity(item_vector, other_vector)
-                similarities.append((idx_to_item[other_idx], similarity))
+        n = min(n, len(similarities) - 1)
+        if n <= 0:
+            return []
         
-        similarities.sort(key=lambda x: x[1], reverse=True)
-        return similarities[:n]
+        top = np.argpartition(-similarities, n - 1)[:n]
+        top = top[np.argsort(-similarities[top], kind='stable')]
+        return [(self.idx_to_item[idx], similarity) for idx, similarity in zip(top, similarities[top])]
     
     def cosine_similarity(self, vec1: np.ndarray, vec2: np.ndarray) -> float:
         dot_product = np.dot(vec1, vec2)
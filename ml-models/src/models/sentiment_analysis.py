@@ -1,7 +1,12 @@
 import numpy as np
 from typing import List, Dict, Tuple
+import base64
 import json
 
+# Texts embedded per gather in _mean_embeddings; bounds the (batch, length,
+# dim) temporary to a few MB
+EMBEDDING_BATCH_SIZE = 256
+
 class SentimentAnalysisModel:
     def __init__(self):
         self.vocabulary = {}
@@ -35,7 +40,8 @@ class SentimentAnalysisModel:
         
         return vector
     
-    def train(self, texts: List[str], labels: List[int], epochs: int = 10, learning_rate: float = 0.01):
+    def train(self, texts: List[str], labels: List[int], epochs: int = 10, learning_rate: float = 0.01,
+              batch_size: int = 32):
         self.build_vocabulary(texts)
         
         X = np.array([self.text_to_vector(text) for text in texts])
@@ -44,57 +50,83 @@ class SentimentAnalysisModel:
         vocab_size = len(self.vocabulary)
         embedding_dim = 50
         
-        self.word_vectors = np.random.randn(vocab_size, embedding_dim) * 0.01
+        self.word_vectors = np.random.randn(vocab_size, embedding_dim).astype(np.float32) * np.float32(0.01)
         self.model_weights = np.random.randn(embedding_dim) * 0.01
         self.bias = 0.0
         
+        # The word vectors stay fixed during training, so every text's
+        # embedding is computed once up front
+        embeddings = self._mean_embeddings(X)
+        
         for epoch in range(epochs):
             total_loss = 0
             correct = 0
             
-            for i in range(len(X)):
-                embedded = np.mean([self.word_vectors[idx] for idx in X[i] if idx < vocab_size], axis=0)
-                
-                if embedded.shape[0] == 0:
-                    embedded = np.zeros(embedding_dim)
+            # Logistic-regression gradient steps over shuffled mini-batches,
+            # one matrix product per batch instead of one update per text.
+            # The per-text gradients of a batch are summed rather than
+            # averaged, so learning_rate keeps its per-sample meaning and an
+            # epoch moves the weights as far as per-sample SGD did
+            order = np.random.permutation(len(X))
+            for start in range(0, len(X), batch_size):
+                batch = order[start:start + batch_size]
+                embedded = embeddings[batch]
+                targets = y[batch]
                 
-                prediction = self.sigmoid(np.dot(embedded, self.model_weights) + self.bias)
+                predictions = self.sigmoid(embedded @ self.model_weights + self.bias)
                 
-                loss = -( y[i] * np.log(prediction + 1e-10) + (1 - y[i]) * np.log(1 - prediction + 1e-10))
-                total_loss += loss
+                losses = -(targets * np.log(predictions + 1e-10) + (1 - targets) * np.log(1 - predictions + 1e-10))
+                total_loss += losses.sum()
+                correct += np.count_nonzero((predictions > 0.5) == (targets == 1))
                 
-                if (prediction > 0.5 and y[i] == 1) or (prediction <= 0.5 and y[i] == 0):
-                    correct += 1
-                
-                error = prediction - y[i]
-                self.model_weights -= learning_rate * error * embedded
-                self.bias -= learning_rate * error
+                errors = predictions - targets
+                self.model_weights -= learning_rate * (embedded.T @ errors)
+                self.bias -= learning_rate * errors.sum()
             
             accuracy = correct / len(X)
             print(f"Epoch {epoch + 1}/{epochs}, Loss: {total_loss / len(X):.4f}, Accuracy: {accuracy:.4f}")
     
     def predict(self, text: str) -> Tuple[float, str]:
         vector = self.text_to_vector(text)
-        vocab_size = len(self.vocabulary)
-        embedding_dim = self.word_vectors.shape[1]
-        
-        embedded = np.mean([self.word_vectors[idx] for idx in vector if idx < vocab_size], axis=0)
-        
-        if embedded.shape[0] == 0:
-            embedded = np.zeros(embedding_dim)
+        embedded = self._mean_embeddings(vector[np.newaxis])[0]
         
         score = self.sigmoid(np.dot(embedded, self.model_weights) + self.bias)
         sentiment = "positive" if score > 0.5 else "negative"
         
         return score, sentiment
     
+    def _mean_embeddings(self, X: np.ndarray) -> np.ndarray:
+        # Mean word vector of each row of token ids, skipping ids outside the
+        # vocabulary; rows without any valid id embed to zeros
+        vocab_size = len(self.vocabulary)
+        embeddings = np.zeros((len(X), self.word_vectors.shape[1]), dtype=np.float32)
+        
+        for start in range(0, len(X), EMBEDDING_BATCH_SIZE):
+            ids = X[start:start + EMBEDDING_BATCH_SIZE]
+            valid = ids < vocab_size
+            vectors = self.word_vectors[np.where(valid, ids, 0)]
+            if not valid.all():
+                vectors[~valid] = 0
+            counts = valid.sum(axis=1, keepdims=True)
+            embeddings[start:start + len(ids)] = vectors.sum(axis=1) / np.maximum(counts, 1)
+        
+        return embeddings
+    
     def sigmoid(self, x):
         return 1 / (1 + np.exp(-np.clip(x, -500, 500)))
     
     def save_model(self, filepath: str):
+        # Word vectors are stored as int8 with one scale per row, base64
+        # encoded, instead of a JSON list of floats
+        scale = np.abs(self.word_vectors).max(axis=1) / 127
+        scale[scale == 0] = 1
+        quantized = np.round(self.word_vectors / scale[:, np.newaxis]).astype(np.int8)
+        
         model_data = {
             'vocabulary': self.vocabulary,
-            'word_vectors': self.word_vectors.tolist(),
+            'word_vectors_int8': base64.b64encode(quantized.tobytes()).decode('ascii'),
+            'word_vectors_scale': scale.tolist(),
+            'word_vectors_shape': list(quantized.shape),
             'model_weights': self.model_weights.tolist(),
             'bias': float(self.bias)
         }
@@ -106,6 +138,12 @@ class SentimentAnalysisModel:
             model_data = json.load(f)
         
         self.vocabulary = model_data['vocabulary']
-        self.word_vectors = np.array(model_data['word_vectors'])
+        if 'word_vectors_int8' in model_data:
+            quantized = np.frombuffer(base64.b64decode(model_data['word_vectors_int8']), dtype=np.int8)
+            quantized = quantized.reshape(model_data['word_vectors_shape'])
+            scale = np.array(model_data['word_vectors_scale'], dtype=np.float32)
+            self.word_vectors = quantized.astype(np.float32) * scale[:, np.newaxis]
+        else:
+            self.word_vectors = np.array(model_data['word_vectors'], dtype=np.float32)
         self.model_weights = np.array(model_data['model_weights'])
         self.bias = model_data['bias']